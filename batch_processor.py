@@ -6,12 +6,14 @@ Process multiple questions through RAG pipeline with database persistence.
 Features:
     - Single question processing
     - Batch processing with progress tracking
+    - Batched retrieval with concurrent generation
     - Full RAG pipeline integration (Retriever + Generator)
     - Database persistence
     - Error handling
 """
 
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Any, Dict, List, Optional
 
 from rich.console import Console
@@ -65,7 +67,8 @@ class BatchQueryProcessor:
         patient_info: Optional[str] = None,
         threshold: float = None,
         top_k: int = None,
-        validate_quality: bool = False
+        validate_quality: bool = False,
+        retrieval_results: Optional[List] = None
     ) -> Dict[str, Any]:
         """Process a single question through RAG pipeline.
 
@@ -76,6 +79,8 @@ class BatchQueryProcessor:
             threshold: Similarity threshold (default: config.SIMILARITY_THRESHOLD).
             top_k: Number of contexts to retrieve (default: config.TOP_K).
             validate_quality: Whether to run quality validation.
+            retrieval_results: Precomputed (Document, score) results for this
+                question (e.g. from process_batch); retrieval is skipped when given.
 
         Returns:
             Dictionary containing answer, citations, metadata, and timing information.
@@ -86,12 +91,13 @@ class BatchQueryProcessor:
         top_k = top_k or config.TOP_K
         
         try:
-            # 1. Retrieve contexts
-            retrieval_results = self.retriever.retrieve(
-                query=question,
-                k=top_k,
-                threshold=threshold
-            )
+            # 1. Retrieve contexts (unless precomputed)
+            if retrieval_results is None:
+                retrieval_results = self.retriever.retrieve(
+                    query=question,
+                    k=top_k,
+                    threshold=threshold
+                )
             
             # 2. Format contexts for LLM
             formatted_contexts = self.retriever.format_contexts_for_llm(retrieval_results)
@@ -125,22 +131,118 @@ class BatchQueryProcessor:
             console.print(f"[red]✗[/red] Error processing question: {e}")
             
             # Return error result
-            return {
-                "question": question,
-                "answer": f"❌ Error: {str(e)}",
-                "mode": mode,
-                "patient_info": patient_info or "",
-                "threshold": threshold,
-                "top_k": top_k,
-                "retrieval_results": [],
-                "citations": [],
-                "reasoning": "",
-                "prompt_tokens": 0,
-                "completion_tokens": 0,
-                "total_tokens": 0,
-                "query_time": time.time() - start_time,
-                "error": str(e)
+            return self._error_result(
+                question, mode, patient_info, threshold, top_k, e,
+                query_time=time.time() - start_time
+            )
+    
+    @staticmethod
+    def _error_result(
+        question: str,
+        mode: str,
+        patient_info: Optional[str],
+        threshold: float,
+        top_k: int,
+        error: Exception,
+        query_time: float = 0.0
+    ) -> Dict[str, Any]:
+        """Result dict for a failed question (same keys as a successful one)."""
+        return {
+            "question": question,
+            "answer": f"❌ Error: {str(error)}",
+            "mode": mode,
+            "patient_info": patient_info or "",
+            "threshold": threshold,
+            "top_k": top_k,
+            "retrieval_results": [],
+            "citations": [],
+            "reasoning": "",
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "query_time": query_time,
+            "error": str(error)
+        }
+    
+    def process_batch(
+        self,
+        questions: List[str],
+        modes: List[str],
+        patient_infos: Optional[List[Optional[str]]] = None,
+        threshold: float = None,
+        top_k: int = None,
+        progress_callback=None,
+        max_workers: int = None
+    ) -> List[Dict[str, Any]]:
+        """Process questions with one batched retrieval and concurrent generation.
+
+        All questions are embedded and searched together (Retriever.retrieve_batch),
+        then answers are generated concurrently since generation is bound by
+        LLM API latency. Results are not saved to the database.
+
+        Args:
+            questions: List of questions to process.
+            modes: Generation mode per question.
+            patient_infos: Patient info per question (optional).
+            threshold: Similarity threshold for retrieval.
+            top_k: Number of contexts to retrieve.
+            progress_callback: Callback function(current, total, message), called
+                from the calling thread as each question completes.
+            max_workers: Concurrent generations (default: config.BATCH_QUERY_WORKERS).
+
+        Returns:
+            List of result dictionaries, in question order.
+        """
+        if not questions:
+            return []
+        
+        threshold = threshold if threshold is not None else config.SIMILARITY_THRESHOLD
+        top_k = top_k or config.TOP_K
+        patient_infos = patient_infos or [None] * len(questions)
+        total = len(questions)
+        
+        console.print(f"\n[bold cyan]Processing {total} questions (batched)...[/bold cyan]")
+        
+        # 1. Retrieve for all questions at once
+        try:
+            per_question = self.retriever.retrieve_batch(questions, k=top_k, threshold=threshold)
+        except Exception as e:
+            console.print(f"[yellow]⚠️[/yellow] Batched retrieval failed, retrieving per question: {e}")
+            per_question = [None] * total
+        
+        # 2. Generate concurrently
+        results: List[Optional[Dict[str, Any]]] = [None] * total
+        with ThreadPoolExecutor(max_workers=max_workers or config.BATCH_QUERY_WORKERS) as executor:
+            futures = {
+                executor.submit(
+                    self.process_single_question,
+                    question=question,
+                    mode=mode,
+                    patient_info=patient_info,
+                    threshold=threshold,
+                    top_k=top_k,
+                    retrieval_results=retrieval_results
+                ): i
+                for i, (question, mode, patient_info, retrieval_results)
+                in enumerate(zip(questions, modes, patient_infos, per_question))
             }
+            
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    console.print(f"[red]✗[/red] {i + 1}/{total} failed: {e}")
+                    results[i] = self._error_result(
+                        questions[i], modes[i], patient_infos[i], threshold, top_k, e
+                    )
+                
+                if progress_callback:
+                    progress_callback(done, total, f"{questions[i][:50]}...")
+        
+        console.print(f"\n[green]✓[/green] Batch processing complete: {total} questions")
+        
+        return results
     
     def process_questions(
         self,
@@ -196,14 +298,6 @@ class BatchQueryProcessor:
                 )
                 
                 results.append(result)
-                
-                # Save to database
-                if save_to_db and self.db:
-                    try:
-                        self.db.insert_query(result)
-                    except Exception as e:
-                        console.print(f"[yellow]⚠️[/yellow] DB save failed: {e}")
-                
                 console.print(f"[green]✓[/green] {i}/{total}: {question[:50]}...")
             
             except Exception as e:
@@ -215,6 +309,16 @@ class BatchQueryProcessor:
                     "error": str(e)
                 })
         
+        # Save to database: one executemany after the loop, so the DB lock and
+        # write transaction are not held across LLM calls
+        if save_to_db and self.db:
+            # Failures caught above lack the row fields (threshold, top_k, ...)
+            rows = [r for r in results if "threshold" in r]
+            try:
+                self.db.insert_queries(rows)
+            except Exception as e:
+                console.print(f"[yellow]⚠️[/yellow] DB save failed: {e}")
+        
         console.print(f"\n[green]✓[/green] Batch processing complete: {len(results)}/{total} succeeded")
         
         return results
@@ -8,20 +8,29 @@ Features:
     - Database persistence
     - CSV and Excel export methods
     - Smart Excel export with word wrap
+    - zstd-compressed context text (optional, requires zstandard)
 """
 
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
-import pandas as pd
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, List, Optional, Union
 from rich.console import Console
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill
-from openpyxl.utils import get_column_letter
-from openpyxl.comments import Comment
 import warnings
 
+# pandas/openpyxl are imported where used, so importing this module stays cheap
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Optional: compress context text columns
+try:
+    import zstandard
+    ZSTANDARD_AVAILABLE = True
+except ImportError:
+    ZSTANDARD_AVAILABLE = False
+
 console = Console()
 
 import config
@@ -32,24 +41,126 @@ DB_PATH = Path("data/batch_queries.db")
 # Excel limits
 EXCEL_CELL_LIMIT = 32767
 
+# Applied once when the connection opens: WAL + NORMAL sync avoids an fsync per commit
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+)
+
+# Context slots per row; retrieval results beyond these are not stored
+MAX_CONTEXTS = 5
+
+# Per-context columns (context1_* ... context5_*), in table order
+CONTEXT_FIELDS = ("text", "reference", "filename", "page", "section", "has_table", "similarity")
+
+# Values of an unused context slot, in CONTEXT_FIELDS order
+EMPTY_CONTEXT = (None, None, None, None, None, 0, None)
+
+# zstd blobs of contextN_text (contextN_text is NULL when the blob is set)
+CONTEXT_ZSTD_COLUMNS = tuple(f"context{i}_text_zstd" for i in range(1, MAX_CONTEXTS + 1))
+
+INSERT_COLUMNS = (
+    "question", "answer", "mode", "threshold", "top_k", "patient_info",
+    *(f"context{i}_{field}" for i in range(1, MAX_CONTEXTS + 1) for field in CONTEXT_FIELDS),
+    "reasoning", "prompt_tokens", "completion_tokens", "total_tokens", "query_time_seconds",
+    *CONTEXT_ZSTD_COLUMNS,
+)
+
+INSERT_SQL = (
+    f"INSERT INTO batch_queries ({', '.join(INSERT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(INSERT_COLUMNS))})"
+)
+
 
 class BatchQueryDB:
     """
     SQLite database operations for batch queries
+    
+    Holds one connection (check_same_thread=False) that is shared by all
+    threads using this instance, e.g. every Streamlit session when the
+    instance is cached with st.cache_resource. All access is serialized
+    through a re-entrant lock.
     """
     
     def __init__(self, db_path: Path = DB_PATH):
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._in_bulk = False  # Inside bulk_insert(): commit deferred to exit
+        self._writes = 0  # Commits made through this instance (see version)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            self._conn.execute(pragma)
         self._init_db()
+        
+        # Column whitelist for get_queries() (blob columns are internal)
+        with self._connection() as conn:
+            self.columns = [
+                row[1] for row in conn.execute("PRAGMA table_info(batch_queries)")
+                if row[1] not in CONTEXT_ZSTD_COLUMNS
+            ]
+    
+    @contextmanager
+    def _connection(self, commit: bool = False):
+        """Lock the shared connection; optionally commit on exit (skipped inside bulk_insert)"""
+        with self._lock:
+            yield self._conn
+            if commit and not self._in_bulk:
+                self._conn.commit()
+                self._writes += 1
+    
+    @property
+    def version(self) -> tuple:
+        """
+        Cheap token that changes whenever the table may have changed
+        
+        Shared by every user of this instance, so it can key caches that
+        are shared across Streamlit sessions. Combines this instance's
+        commit count with PRAGMA data_version, which changes when another
+        connection (e.g. a CLI batch run) commits to the same file.
+        """
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            return (self._writes, data_version)
+    
+    @contextmanager
+    def bulk_insert(self):
+        """
+        Run every insert_query() inside the block in one transaction
+        
+        N rows cost one commit (one fsync) instead of N. Rolls back
+        everything on exception.
+        
+        Example:
+            with db.bulk_insert():
+                for result in results:
+                    db.insert_query(result)
+        """
+        with self._lock:
+            if self._in_bulk:
+                # Nested: the outer block owns the transaction
+                yield
+                return
+            
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._in_bulk = True
+            try:
+                yield
+                self._conn.commit()
+                self._writes += 1
+            except Exception:
+                self._conn.rollback()
+                raise
+            finally:
+                self._in_bulk = False
     
     def _init_db(self):
         """Initialize database with schema - PRESERVES EXISTING DATA"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Create table ONLY IF NOT EXISTS (preserves old records)
-        cursor.execute("""
+        with self._connection(commit=True) as conn:
+            conn.execute("""
         CREATE TABLE IF NOT EXISTS batch_queries (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             
@@ -123,9 +234,12 @@ class BatchQueryDB:
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )
         """)
-        
-        conn.commit()
-        conn.close()
+            
+            # Compressed context columns (added in place to older databases)
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(batch_queries)")}
+            for column in CONTEXT_ZSTD_COLUMNS:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE batch_queries ADD COLUMN {column} BLOB")
         
         # Count existing records
         count = self.get_query_count()
@@ -134,169 +248,211 @@ class BatchQueryDB:
         else:
             console.print(f"[green]✓[/green] Database initialized: {self.db_path}")
     
-    def insert_query(self, data: Dict[str, Any]) -> int:
+    @staticmethod
+    def _build_row(data: Dict[str, Any]) -> tuple:
         """
-        Insert a query with full context text
+        Build the INSERT_SQL parameter tuple for one query
         FIXED: Handles Document objects properly
         
         Args:
             data: Query data with contexts
             
         Returns:
-            Row ID
+            Values in INSERT_COLUMNS order
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        compressor = zstandard.ZstdCompressor(level=3) if ZSTANDARD_AVAILABLE else None
         
         # Prepare context data (FULL TEXT) - Fixed document handling
-        context_data = {}
+        # Values are appended in CONTEXT_FIELDS order, no per-column key lookups
+        context_values = []
+        context_blobs = []
         retrieval_results = data.get('retrieval_results', [])
         citations = data.get('citations', [])
-        for i in range(1, 6):
-            if i - 1 < len(retrieval_results):
-                doc, sim = retrieval_results[i - 1]
-                citation = citations[i - 1] if i - 1 < len(citations) else {}
+        for i in range(MAX_CONTEXTS):
+            if i >= len(retrieval_results):
+                context_values.extend(EMPTY_CONTEXT)
+                context_blobs.append(None)
+                continue
+            
+            doc, sim = retrieval_results[i]
+            citation = citations[i] if i < len(citations) else {}
 
-                # Fixed: Handle Document object properly
-                # Document has attributes, not dictionary keys
-                if hasattr(doc, 'page_content'):
-                    # It's a Document object
-                    context_text = doc.page_content
-                elif isinstance(doc, dict):
-                    # It's a dictionary
-                    context_text = doc.get('page_content', '')
-                else:
-                    # Unknown type, convert to string
-                    context_text = str(doc)
-                
-                context_data[f'context{i}_text'] = context_text
-                context_data[f'context{i}_reference'] = citation.get('reference', '')
-                context_data[f'context{i}_filename'] = citation.get('filename', '')
-                context_data[f'context{i}_page'] = citation.get('page', None)
-                context_data[f'context{i}_section'] = citation.get('section', '')
-                context_data[f'context{i}_has_table'] = int(citation.get('has_table', False))
-                context_data[f'context{i}_similarity'] = sim
+            # Fixed: Handle Document object properly
+            # Document has attributes, not dictionary keys
+            if hasattr(doc, 'page_content'):
+                # It's a Document object
+                context_text = doc.page_content
+            elif isinstance(doc, dict):
+                # It's a dictionary
+                context_text = doc.get('page_content', '')
             else:
-                context_data[f'context{i}_text'] = None
-                context_data[f'context{i}_reference'] = None
-                context_data[f'context{i}_filename'] = None
-                context_data[f'context{i}_page'] = None
-                context_data[f'context{i}_section'] = None
-                context_data[f'context{i}_has_table'] = 0
-                context_data[f'context{i}_similarity'] = None
-        
-        # Insert
-        cursor.execute("""
-        INSERT INTO batch_queries (
-            question, answer, mode, threshold, top_k, patient_info,
-            context1_text, context1_reference, context1_filename, context1_page, 
-            context1_section, context1_has_table, context1_similarity,
-            context2_text, context2_reference, context2_filename, context2_page,
-            context2_section, context2_has_table, context2_similarity,
-            context3_text, context3_reference, context3_filename, context3_page,
-            context3_section, context3_has_table, context3_similarity,
-            context4_text, context4_reference, context4_filename, context4_page,
-            context4_section, context4_has_table, context4_similarity,
-            context5_text, context5_reference, context5_filename, context5_page,
-            context5_section, context5_has_table, context5_similarity,
-            reasoning, prompt_tokens, completion_tokens, total_tokens, query_time_seconds
-        ) VALUES (
-            ?, ?, ?, ?, ?, ?,
-            ?, ?, ?, ?, ?, ?, ?,
-            ?, ?, ?, ?, ?, ?, ?,
-            ?, ?, ?, ?, ?, ?, ?,
-            ?, ?, ?, ?, ?, ?, ?,
-            ?, ?, ?, ?, ?, ?, ?,
-            ?, ?, ?, ?, ?
-        )
-        """, (
+                # Unknown type, convert to string
+                context_text = str(doc)
+            
+            # Long chunk text is stored as a zstd blob when available
+            blob = None
+            if compressor is not None and context_text:
+                blob = compressor.compress(context_text.encode('utf-8'))
+                context_text = None
+            
+            context_values.extend((
+                context_text,
+                citation.get('reference', ''),
+                citation.get('filename', ''),
+                citation.get('page', None),
+                citation.get('section', ''),
+                int(citation.get('has_table', False)),
+                sim
+            ))
+            context_blobs.append(blob)
+        
+        return (
             data['question'],
             data['answer'],
             data['mode'],
             data['threshold'],
             data['top_k'],
             data.get('patient_info', ''),  # NEW: CLINICAL INFO
-            # Context 1
-            context_data['context1_text'],
-            context_data['context1_reference'],
-            context_data['context1_filename'],
-            context_data['context1_page'],
-            context_data['context1_section'],
-            context_data['context1_has_table'],
-            context_data['context1_similarity'],
-            # Context 2
-            context_data['context2_text'],
-            context_data['context2_reference'],
-            context_data['context2_filename'],
-            context_data['context2_page'],
-            context_data['context2_section'],
-            context_data['context2_has_table'],
-            context_data['context2_similarity'],
-            # Context 3
-            context_data['context3_text'],
-            context_data['context3_reference'],
-            context_data['context3_filename'],
-            context_data['context3_page'],
-            context_data['context3_section'],
-            context_data['context3_has_table'],
-            context_data['context3_similarity'],
-            # Context 4
-            context_data['context4_text'],
-            context_data['context4_reference'],
-            context_data['context4_filename'],
-            context_data['context4_page'],
-            context_data['context4_section'],
-            context_data['context4_has_table'],
-            context_data['context4_similarity'],
-            # Context 5
-            context_data['context5_text'],
-            context_data['context5_reference'],
-            context_data['context5_filename'],
-            context_data['context5_page'],
-            context_data['context5_section'],
-            context_data['context5_has_table'],
-            context_data['context5_similarity'],
+            *context_values,
             # Reasoning & tokens
             data.get('reasoning', ''),
             data.get('prompt_tokens', 0),
             data.get('completion_tokens', 0),
             data.get('total_tokens', 0),
-            data.get('query_time', 0.0)
-        ))
+            data.get('query_time', 0.0),
+            *context_blobs
+        )
+    
+    def insert_query(self, data: Dict[str, Any]) -> int:
+        """
+        Insert a query with full context text
         
-        row_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        Args:
+            data: Query data with contexts
+            
+        Returns:
+            Row ID
+        """
+        row = self._build_row(data)
+        
+        # Own BEGIN IMMEDIATE ... COMMIT (or joins the enclosing bulk_insert())
+        with self.bulk_insert(), self._connection() as conn:
+            cursor = conn.execute(INSERT_SQL, row)
+            row_id = cursor.lastrowid
         
         return row_id
     
-    def get_all_queries(self) -> pd.DataFrame:
+    def insert_queries(self, results: List[Dict[str, Any]]) -> int:
+        """
+        Insert many queries with one prepared statement (executemany)
+        
+        Rows are built first, then written in a single transaction, so a
+        batch costs one statement prepare and one commit.
+        
+        Args:
+            results: Query data dicts (same format as insert_query)
+            
+        Returns:
+            Number of inserted rows
+        """
+        rows = [self._build_row(data) for data in results]
+        if not rows:
+            return 0
+        
+        with self.bulk_insert(), self._connection() as conn:
+            conn.executemany(INSERT_SQL, rows)
+        
+        return len(rows)
+    
+    def get_all_queries(self) -> "pd.DataFrame":
         """
         Get all queries as DataFrame
         """
-        conn = sqlite3.connect(self.db_path)
-        df = pd.read_sql_query("SELECT * FROM batch_queries ORDER BY id DESC", conn)
-        conn.close()
-        return df
+        return self.get_queries()
+    
+    def get_queries(self, cols: Optional[List[str]] = None, limit: Optional[int] = None) -> "pd.DataFrame":
+        """
+        Get queries (newest first) as DataFrame, reading only the given columns
+        
+        Args:
+            cols: Columns to select (default: all). Must be table columns.
+            limit: Maximum number of rows (default: all)
+            
+        Returns:
+            DataFrame with the selected columns
+            
+        Raises:
+            ValueError: If a column is not in the table
+        """
+        import pandas as pd
+        
+        if cols:
+            unknown = [col for col in cols if col not in self.columns]
+            if unknown:
+                raise ValueError(f"Unknown batch_queries columns: {unknown}")
+            # contextN_text may live in its zstd blob column
+            cols = list(cols) + [f"{col}_zstd" for col in cols if f"{col}_zstd" in CONTEXT_ZSTD_COLUMNS]
+            select = ", ".join(cols)
+        else:
+            select = "*"
+        
+        sql = f"SELECT {select} FROM batch_queries ORDER BY id DESC"
+        params = ()
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = (int(limit),)
+        
+        with self._connection() as conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+        
+        return self._decompress_context_text(df)
+    
+    @staticmethod
+    def _decompress_context_text(df: "pd.DataFrame") -> "pd.DataFrame":
+        """
+        Fill contextN_text from contextN_text_zstd and drop the blob columns
+        
+        Args:
+            df: Query rows, possibly with blob columns
+            
+        Returns:
+            DataFrame with plain-text context columns only
+        """
+        blob_cols = [col for col in CONTEXT_ZSTD_COLUMNS if col in df.columns]
+        if not blob_cols:
+            return df
+        
+        decompressor = zstandard.ZstdDecompressor() if ZSTANDARD_AVAILABLE else None
+        for blob_col in blob_cols:
+            text_col = blob_col[:-len("_zstd")]
+            has_blob = df[blob_col].notna()
+            if not has_blob.any():
+                continue
+            if decompressor is None:
+                console.print(f"[yellow]⚠[/yellow] {blob_col} is zstd-compressed; install zstandard to read it")
+                continue
+            df.loc[has_blob, text_col] = [
+                decompressor.decompress(blob).decode('utf-8')
+                for blob in df.loc[has_blob, blob_col]
+            ]
+        
+        return df.drop(columns=blob_cols)
     
     def get_query_count(self) -> int:
         """Get total number of queries"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM batch_queries")
-        count = cursor.fetchone()[0]
-        conn.close()
-        return count
+        with self._connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM batch_queries").fetchone()[0]
     
-    def export_to_csv(self, output_path: str) -> str:
+    def export_to_csv(self, output_path: Union[str, BinaryIO]) -> Union[str, BinaryIO]:
         """
         Export all queries to CSV (NO CHARACTER LIMIT - RECOMMENDED)
         
         Args:
-            output_path: Output file path
+            output_path: Output file path, or a binary file-like object
+                (e.g. io.BytesIO) to export in memory without touching disk
             
         Returns:
-            Path to exported file
+            Path to exported file (or the file-like object)
         """
         df = self.get_all_queries()
         
@@ -331,7 +487,8 @@ class BatchQueryDB:
         # Export to CSV (NO LIMITS!)
         df.to_csv(output_path, index=False, encoding='utf-8-sig')
 
-        console.print(f"[green]✓[/green] CSV Export (NO DATA LOSS): {output_path}")
+        target = output_path if isinstance(output_path, str) else "in-memory buffer"
+        console.print(f"[green]✓[/green] CSV Export (NO DATA LOSS): {target}")
         console.print(f"[cyan]→[/cyan] {len(df)} records exported with full context text")
         
         return output_path
@@ -351,7 +508,7 @@ class BatchQueryDB:
         console.print("Using legacy export_to_excel, redirecting to export_to_excel_smart")
         return self.export_to_excel_smart(output_path)
     
-    def export_to_excel_smart(self, output_path: str) -> str:
+    def export_to_excel_smart(self, output_path: Union[str, BinaryIO]) -> Union[str, BinaryIO]:
         """
         SMART Excel Export - PhpSpreadsheet style, NO data loss!
         
@@ -361,11 +518,18 @@ class BatchQueryDB:
         3. Column width is optimized
         
         Args:
-            output_path: Output file path
+            output_path: Output file path, or a binary file-like object
+                (e.g. io.BytesIO) to export in memory without touching disk
             
         Returns:
-            Path to exported file
+            Path to exported file (or the file-like object)
         """
+        import openpyxl
+        import pandas as pd
+        from openpyxl.comments import Comment
+        from openpyxl.styles import Alignment, Font, PatternFill
+        from openpyxl.utils import get_column_letter
+        
         df = self.get_all_queries()
         
         if len(df) == 0:
@@ -495,7 +659,8 @@ class BatchQueryDB:
             warnings.simplefilter("ignore")
             wb.save(output_path)
         
-        console.print(f"SMART Excel Export: {output_path}")
+        target = output_path if isinstance(output_path, str) else "in-memory buffer"
+        console.print(f"SMART Excel Export: {target}")
         console.print(f"{len(df)} word wrap ile export edildi")
         console.print(f"Bilgi kaybi yok!")
         
@@ -503,10 +668,7 @@ class BatchQueryDB:
     
     def clear_all(self):
         """Delete all records"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM batch_queries")
-        conn.commit()
-        conn.close()
+        with self._connection(commit=True) as conn:
+            conn.execute("DELETE FROM batch_queries")
         console.print("All records deleted")
 
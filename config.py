@@ -38,6 +38,7 @@ RAW_DATA_DIR = BASE_DIR / "data" / "raw"
 PROCESSED_DATA_DIR = BASE_DIR / "data" / "processed"
 VECTORSTORE_PATH = BASE_DIR / "data" / "vectorstore" / "faiss_index"
 CHUNKS_PATH = PROCESSED_DATA_DIR / "chunks.json"
+CACHE_DIR = BASE_DIR / ".cache"
 
 # ============================================================================
 # API KEYS
@@ -52,11 +53,27 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 EMBEDDING_MODEL = "BAAI/bge-m3"
 EMBEDDING_DIM = 1024  # BGE-M3 dimension
 EMBEDDING_BATCH_SIZE = 8
+EMBEDDING_API_CONCURRENCY = 8  # Concurrent HuggingFace API requests
+EMBEDDING_API_MAX_ATTEMPTS = 5  # Attempts per text when rate limited (HTTP 429)
+VERIFY_EMBEDDING_DIM = False  # Run a test embedding on startup (debug only)
+TORCH_COMPILE = False  # Compile the local model forward pass with torch.compile
+CACHE_TOKENIZATION = False  # Cache document token ids on disk (CACHE_DIR/tok)
 
 # ============================================================================
 # VECTOR STORE (FAISS)
 # ============================================================================
-FAISS_INDEX_TYPE = "IndexFlatIP"  # Inner Product (cosine similarity)
+FAISS_INDEX_TYPE = "IndexFlatIP"  # "IndexFlatIP" (exact) | "IndexScalarQuantizer" | "IndexHNSWFlat" | "IndexIVFPQ"
+FAISS_SQ_TYPE = "QT_8bit"  # IndexScalarQuantizer codec: "QT_8bit" (4x smaller) | "QT_fp16" (2x)
+FAISS_HNSW_M = 32  # HNSW graph neighbors per node
+FAISS_HNSW_EF_CONSTRUCTION = 200  # HNSW build-time beam width
+FAISS_HNSW_EF_SEARCH = 64  # HNSW query-time beam width
+FAISS_IVF_NPROBE = 16  # IVF lists probed per query
+FAISS_PQ_M = 64  # PQ sub-quantizers (must divide EMBEDDING_DIM)
+FAISS_RANGE_SEARCH_MIN_THRESHOLD = 0.50  # Below this threshold range_search hits most of the corpus; use bounded top-k search
+FAISS_MMAP_INDEX = True  # Retriever memory-maps the index read-only (shared page cache; Flat/SQ/HNSW need faiss with IO_FLAG_MMAP_IFC, else loaded into RAM); FaissVectorStore.load() stays writable
+DEDUP_ON_INGEST = False  # Skip near-duplicate chunks in add_documents (drops them from the index for good)
+DEDUP_JACCARD_THRESHOLD = 0.95  # Prefix word-set Jaccard above which chunks are duplicates
+MINHASH_NUM_PERM = 128  # MinHash permutations for the ingest LSH index (datasketch)
 
 # ============================================================================
 # DOCUMENT PROCESSING
@@ -68,6 +85,15 @@ EXTRACT_TABLES = True
 # Use GPT-guided chunking
 USE_GPT_CHUNKING = True
 GPT_CHUNKING_MODEL = "gpt-4o-mini"
+GPT_CHUNKING_CONCURRENCY = 10  # Max in-flight split requests in chunk_text_batch
+GPT_CHUNKING_RPM = 500  # OpenAI requests-per-minute budget
+GPT_CHUNKING_TPM = 200_000  # OpenAI tokens-per-minute budget
+GPT_CHUNKING_MAX_RETRIES = 5  # Attempts per request on HTTP 429
+GPT_CHUNKING_PACK_CHARS = 10_000  # Max text chars packed into one split request
+GPT_CHUNKING_PACK_SIZE = 8  # Max texts packed into one split request
+GPT_CHUNKING_CACHE = True  # Cache GPT split indices by text hash (CACHE_DIR/gpt_chunker)
+GPT_CHUNKING_USE_BATCH_API = False  # Ingest via OpenAI Batch API (50% cheaper, up to 24h)
+GPT_CHUNKING_BATCH_POLL_INTERVAL = 30  # Seconds between batch status checks
 
 # ============================================================================
 # RETRIEVAL
@@ -84,6 +110,7 @@ DEEPSEEK_BASE_URL = "https://api.deepseek.com"
 DEEPSEEK_MAX_TOKENS = 4000
 DEEPSEEK_TIMEOUT = 120  # Timeout in seconds
 DEEPSEEK_TEMPERATURE = 0.3
+DEEPSEEK_HEALTHCHECK = False  # Send a test request when Generator is created
 
 # Mode-specific temperatures
 MODE_TEMPERATURES = {
@@ -97,6 +124,11 @@ MODE_TEMPERATURES = {
 # ============================================================================
 BATCH_SIZE = 8
 MAX_WORKERS = 4
+BATCH_QUERY_WORKERS = 8  # Questions processed concurrently in the batch tab (LLM I/O bound)
+
+# Shared HTTP connection pool (reused across Generator instances)
+HTTP_MAX_CONNECTIONS = 32
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 16
 
 # ============================================================================
 # SYSTEM PROMPTS
@@ -21,7 +21,7 @@ Examples:
 from .embedding_service import EmbeddingService
 from .vector_store import FaissVectorStore
 from .retriever import Retriever
-from .generator import Generator
+from .generator import Citations, Generator
 from .citation_formatter import CitationFormatter
 
 __all__ = [
@@ -29,6 +29,7 @@ __all__ = [
     'FaissVectorStore',
     'Retriever',
     'Generator',
+    'Citations',
     'CitationFormatter'
 ]
 
@@ -128,6 +128,7 @@ class GPTDocumentProcessor:
         Process multiple documents with GPT-guided chunking
         """
         all_documents = []
+        gpt_pages = []  # Pages chunked together after extraction
         
         # Progress tracking
         iterator = tqdm(
@@ -150,42 +151,20 @@ class GPTDocumentProcessor:
             console.print(f"\n[cyan]Processing:[/cyan] {file_path.name}")
             
             # Extract pages
-            pages_data = self.extract_text_with_metadata(str(file_path))
+            pages_data = [
+                page_data
+                for page_data in self.extract_text_with_metadata(str(file_path))
+                if page_data["text"].strip()
+            ]
             
-            # Process each page
-            for page_data in pages_data:
-                text = page_data["text"]
-                
-                if not text.strip():
-                    continue
-                
-                # GPT-guided chunking
-                if self.use_gpt_chunking:
-                    chunks_data = self.gpt_chunker.chunk_text(
-                        text=text,
-                        metadata={
-                            "filename": page_data["filename"],
-                            "page": page_data["page"],
-                            "total_pages": page_data["total_pages"],
-                            "source": page_data["source"],
-                            "created_at": page_data["created_at"],
-                        }
-                    )
-                    
-                    # Convert to LangChain Documents
-                    for chunk_data in chunks_data:
-                        doc = Document(
-                            page_content=chunk_data["content"],
-                            metadata={
-                                **chunk_data["metadata"],
-                                "chunk_strategy": chunk_data["chunk_strategy"],
-                            }
-                        )
-                        all_documents.append(doc)
-                
-                else:
-                    # Fallback: Uniform chunking
-                    chunks = self.text_splitter.split_text(text)
+            # GPT-guided chunking: deferred so the whole corpus goes out at once
+            if self.use_gpt_chunking:
+                gpt_pages.extend(pages_data)
+            
+            else:
+                # Fallback: Uniform chunking
+                for page_data in pages_data:
+                    chunks = self.text_splitter.split_text(page_data["text"])
                     
                     for i, chunk in enumerate(chunks):
                         doc = Document(
@@ -203,6 +182,38 @@ class GPTDocumentProcessor:
                         )
                         all_documents.append(doc)
         
+        if gpt_pages:
+            chunk_pages = (
+                self.gpt_chunker.chunk_corpus_via_batch
+                if config.GPT_CHUNKING_USE_BATCH_API
+                else self.gpt_chunker.chunk_text_batch
+            )
+            chunks_per_page = chunk_pages(
+                texts=[page_data["text"] for page_data in gpt_pages],
+                metadatas=[
+                    {
+                        "filename": page_data["filename"],
+                        "page": page_data["page"],
+                        "total_pages": page_data["total_pages"],
+                        "source": page_data["source"],
+                        "created_at": page_data["created_at"],
+                    }
+                    for page_data in gpt_pages
+                ]
+            )
+            
+            # Convert to LangChain Documents
+            for chunks_data in chunks_per_page:
+                for chunk_data in chunks_data:
+                    doc = Document(
+                        page_content=chunk_data["content"],
+                        metadata={
+                            **chunk_data["metadata"],
+                            "chunk_strategy": chunk_data["chunk_strategy"],
+                        }
+                    )
+                    all_documents.append(doc)
+        
         # Summary
         console.print(f"\n[green]✓[/green] Processed {len(file_paths)} files")
         console.print(f"[green]✓[/green] Created {len(all_documents)} chunks")
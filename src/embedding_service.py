@@ -11,11 +11,14 @@ Features:
     - Cross-lingual similarity testing
 """
 
-import time
-from typing import List
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Callable, List, Optional
 
 import numpy as np
 from rich.console import Console
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 
 console = Console()
 
@@ -28,7 +31,7 @@ except ImportError:
 
 # Fallback: HuggingFace API
 try:
-    from huggingface_hub import InferenceClient
+    from huggingface_hub import AsyncInferenceClient, InferenceClient
     HF_INFERENCE_AVAILABLE = True
 except ImportError:
     HF_INFERENCE_AVAILABLE = False
@@ -36,6 +39,61 @@ except ImportError:
 import config
 
 
+class RateLimitError(Exception):
+    """Raised when the HuggingFace API answers with HTTP 429 (Too Many Requests).
+
+    Attributes:
+        retry_after: Seconds to wait as requested by the Retry-After header, if any.
+    """
+
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__(f"Rate limited (retry after: {retry_after})")
+        self.retry_after = retry_after
+
+
+def _rate_limit_info(error: Exception):
+    """Extract (status_code, retry_after) from an HTTP error raised by the HF client."""
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None) or getattr(error, "status", None)
+    headers = getattr(response, "headers", None) or getattr(error, "headers", None) or {}
+    
+    retry_after = None
+    try:
+        retry_after = float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        pass
+    
+    return status, retry_after
+
+
+_exponential_wait = wait_random_exponential(min=1, max=30)
+
+
+def _wait_for_rate_limit(retry_state) -> float:
+    """Wait as long as Retry-After asks, otherwise exponential backoff with jitter."""
+    error = retry_state.outcome.exception()
+    if getattr(error, "retry_after", None) is not None:
+        return error.retry_after
+    return _exponential_wait(retry_state)
+
+
+@retry(
+    retry=retry_if_exception_type(RateLimitError),
+    wait=_wait_for_rate_limit,
+    stop=stop_after_attempt(config.EMBEDDING_API_MAX_ATTEMPTS),
+    reraise=True,
+)
+async def _feature_extraction_with_backoff(client, text: str):
+    """Call feature_extraction, backing off only when the API rate-limits us."""
+    try:
+        return await client.feature_extraction(text, model=config.EMBEDDING_MODEL)
+    except Exception as e:
+        status, retry_after = _rate_limit_info(e)
+        if status == 429:
+            raise RateLimitError(retry_after) from e
+        raise
+
+
 class EmbeddingService:
     """BGE-M3 Embedding Service with Local and API Support.
 
@@ -67,6 +125,7 @@ class EmbeddingService:
         self.use_local = use_local
         self.model = None
         self.client = None
+        self._tok_cache_dir = Path(config.CACHE_DIR) / "tok"
         
         # Try local first
         if use_local and SENTENCE_TRANSFORMERS_AVAILABLE:
@@ -85,22 +144,46 @@ class EmbeddingService:
             console.print("[yellow]First time: Downloading model (~2GB)...[/yellow]")
             
             self.model = SentenceTransformer('BAAI/bge-m3')
+            self.use_local = True
             
-            # Test
-            test_emb = self.model.encode("test", convert_to_numpy=True)
-            assert len(test_emb) == config.EMBEDDING_DIM
+            if config.TORCH_COMPILE:
+                self._compile_model()
+            
+            # Test (debug only: the first forward pass is slow)
+            if __debug__ and config.VERIFY_EMBEDDING_DIM:
+                self.warmup()
             
             console.print(f"[green]✓[/green] BGE-M3 ready (local mode)")
             console.print(f"  Dimension: {config.EMBEDDING_DIM}")
             console.print(f"  Mode: Local (no API calls)")
-            
-            self.use_local = True
         
         except Exception as e:
             console.print(f"[red]✗[/red] Local init failed: {e}")
             console.print("[yellow]Falling back to API mode...[/yellow]")
             self._init_api()
     
+    def _compile_model(self):
+        """Compile the transformer forward pass with torch.compile.
+
+        Uses dynamic shapes since sequence lengths vary across inputs. Keeps
+        the eager model if torch.compile is unavailable or fails.
+        """
+        import torch
+        
+        if not hasattr(torch, "compile"):
+            console.print("[yellow]⚠ torch.compile not available, using eager model[/yellow]")
+            return
+        
+        try:
+            self.model[0].auto_model = torch.compile(
+                self.model[0].auto_model,
+                mode="reduce-overhead",
+                dynamic=True
+            )
+            console.print("[green]✓[/green] BGE-M3 forward pass compiled (torch.compile)")
+        except RuntimeError as e:
+            console.print(f"[yellow]⚠ torch.compile failed, using eager model: {e}[/yellow]")
+    
     def _init_api(self):
         """Initialize HuggingFace Inference API.
 
@@ -121,31 +204,34 @@ class EmbeddingService:
             console.print("[cyan]Initializing BGE-M3 (API)...[/cyan]")
             
             self.client = InferenceClient(token=hf_token)
+            self.use_local = False
+            self.model = None
             
-            # Test
-            test_result = self.client.feature_extraction(
-                "test",
-                model=config.EMBEDDING_MODEL
-            )
-            
-            if isinstance(test_result, list):
-                test_emb = test_result
-            else:
-                test_emb = test_result.tolist()
-            
-            assert len(test_emb) == config.EMBEDDING_DIM
+            # Test (debug only: costs one API round-trip)
+            if __debug__ and config.VERIFY_EMBEDDING_DIM:
+                self.warmup()
             
             console.print(f"[green]✓[/green] BGE-M3 ready (API mode)")
             console.print(f"  Dimension: {config.EMBEDDING_DIM}")
             console.print("[yellow]⚠ API is slow. Install: pip install sentence-transformers[/yellow]")
-            
-            self.use_local = False
-            self.model = None
         
         except Exception as e:
             console.print(f"[red]✗[/red] API init failed: {e}")
             raise
     
+    def warmup(self):
+        """Run a single test embedding to warm up the model and verify its dimension.
+
+        Intended to be called off the startup path (e.g. from a background
+        thread once the service is up), since the first forward pass compiles
+        kernels and allocates workspaces.
+
+        Raises:
+            AssertionError: If the embedding dimension does not match config.EMBEDDING_DIM.
+        """
+        test_emb = self.embed_query("test")
+        assert len(test_emb) == config.EMBEDDING_DIM
+    
     def embed_query(self, text: str) -> List[float]:
         """Embed a single query text.
 
@@ -166,62 +252,259 @@ class EmbeddingService:
             return result
         return result.tolist()
     
+    def embed_queries(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Embed several query texts in one pass.
+
+        Locally this is a single batched forward pass instead of one per
+        query; in API mode queries are still sent one by one.
+
+        Args:
+            texts: Query texts to embed.
+            batch_size: Encoder batch size (local mode).
+
+        Returns:
+            C-contiguous float32 array of shape (len(texts), EMBEDDING_DIM).
+        """
+        if self.use_local and self.model:
+            embeddings = self.model.encode(
+                texts,
+                batch_size=batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True
+            )
+            return np.ascontiguousarray(embeddings, dtype=np.float32)
+        
+        embeddings = np.empty((len(texts), config.EMBEDDING_DIM), dtype=np.float32)
+        for i, text in enumerate(texts):
+            embeddings[i] = self.embed_query(text)
+        return embeddings
+    
     def embed_documents(
         self,
         texts: List[str],
         batch_size: int = None,
-        show_progress: bool = True
-    ) -> List[List[float]]:
+        show_progress: bool = True,
+        sink: Optional[Callable[[int, np.ndarray], None]] = None,
+        concurrency_limit: int = None
+    ) -> np.ndarray:
         """Embed multiple documents in batch.
 
         Args:
             texts: List of document texts to embed.
             batch_size: Batch size for processing (default: from config).
             show_progress: Whether to display progress bar.
+            sink: Optional callback receiving (index, embedding) as soon as each
+                embedding is ready. When given, embeddings are streamed to the
+                sink instead of being buffered and an empty (0, EMBEDDING_DIM)
+                array is returned.
+            concurrency_limit: Number of concurrent API requests in API mode
+                (default: config.EMBEDDING_API_CONCURRENCY).
 
         Returns:
-            List of embedding vectors, one per document.
+            C-contiguous float32 array of shape (len(texts), EMBEDDING_DIM),
+            one row per document, or shape (0, EMBEDDING_DIM) if sink is
+            given. (Previously a List[List[float]]; callers that need lists
+            must call .tolist().)
         """
         batch_size = batch_size or config.BATCH_SIZE
+        concurrency_limit = concurrency_limit or config.EMBEDDING_API_CONCURRENCY
         
         # Local mode (fast)
         if self.use_local and self.model:
             console.print(f"[cyan]Embedding {len(texts)} documents (local)...[/cyan]")
             
-            embeddings = self.model.encode(
-                texts,
-                batch_size=batch_size,
-                show_progress_bar=show_progress,
-                convert_to_numpy=True
-            )
+            if config.CACHE_TOKENIZATION:
+                input_ids = self._tokenize_cached(texts)
+                embeddings = self._encode_token_ids(input_ids, batch_size, show_progress)
+            else:
+                embeddings = self.model.encode(
+                    texts,
+                    batch_size=batch_size,
+                    show_progress_bar=show_progress,
+                    convert_to_numpy=True
+                )
+                embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
             
             console.print(f"[green]✓[/green] Embedded {len(embeddings)} documents")
-            return [emb.tolist() for emb in embeddings]
+            
+            if sink is not None:
+                for idx, emb in enumerate(embeddings):
+                    sink(idx, emb)
+                return np.empty((0, config.EMBEDDING_DIM), dtype=np.float32)
+            return embeddings
         
         # API mode (slow)
         console.print(f"[yellow]API mode: Embedding {len(texts)} documents...[/yellow]")
-        console.print("[yellow]This will take 1-2 hours (rate limited)[/yellow]")
+        console.print("[yellow]This may take a while (backs off when rate limited)[/yellow]")
         
-        embeddings = []
+        embeddings = np.empty((0, config.EMBEDDING_DIM), dtype=np.float32)
+        if sink is None:
+            # Buffer results in input order, straight into one preallocated matrix
+            embeddings = np.empty((len(texts), config.EMBEDDING_DIM), dtype=np.float32)
+            
+            def sink(idx: int, emb: np.ndarray):
+                embeddings[idx] = emb
         
+        progress = None
         if show_progress:
             from tqdm import tqdm
-            iterator = tqdm(texts, desc="Embedding (API)")
-        else:
-            iterator = texts
+            progress = tqdm(total=len(texts), desc="Embedding (API)")
         
-        for text in iterator:
-            try:
-                emb = self.embed_query(text)
-                embeddings.append(emb)
-                time.sleep(0.1)  # Rate limit
-            except Exception as e:
-                console.print(f"[red]✗[/red] Error: {e}")
-                embeddings.append([0.0] * config.EMBEDDING_DIM)
+        try:
+            asyncio.run(self._embed_documents_api(texts, sink, concurrency_limit, progress))
+        finally:
+            if progress is not None:
+                progress.close()
         
-        console.print(f"[green]✓[/green] Embedded {len(embeddings)} documents")
+        console.print(f"[green]✓[/green] Embedded {len(texts)} documents")
         return embeddings
     
+    def _tokenize_cached(self, texts: List[str]) -> List[np.ndarray]:
+        """Tokenize texts, reusing token ids cached on disk by text hash.
+
+        Cache entries live under CACHE_DIR/tok/<hash[:2]>/<hash>.npy and are
+        keyed on model name, max sequence length and text, so re-embedding a
+        corpus (e.g. after a failed run) skips tokenization.
+
+        Args:
+            texts: List of document texts to tokenize.
+
+        Returns:
+            List of int32 token id arrays (unpadded), one per text.
+        """
+        max_length = self.model.max_seq_length
+        input_ids: List[Optional[np.ndarray]] = [None] * len(texts)
+        paths = []
+        missing = []
+        
+        for i, text in enumerate(texts):
+            key = f"{config.EMBEDDING_MODEL}\0{max_length}\0{text}"
+            h = hashlib.sha256(key.encode("utf-8")).hexdigest()
+            path = self._tok_cache_dir / h[:2] / f"{h}.npy"
+            paths.append(path)
+            
+            if path.exists():
+                input_ids[i] = np.load(path)
+            else:
+                missing.append(i)
+        
+        if missing:
+            # Same preprocessing as SentenceTransformer.tokenize (strip + truncate)
+            encoded = self.model.tokenizer(
+                [texts[i].strip() for i in missing],
+                padding=False,
+                truncation=True,
+                max_length=max_length
+            )["input_ids"]
+            
+            for i, ids in zip(missing, encoded):
+                ids = np.asarray(ids, dtype=np.int32)
+                paths[i].parent.mkdir(parents=True, exist_ok=True)
+                np.save(paths[i], ids)
+                input_ids[i] = ids
+        
+        console.print(
+            f"[cyan]→[/cyan] Tokenization cache: {len(texts) - len(missing)} hits, "
+            f"{len(missing)} new"
+        )
+        return input_ids
+    
+    def _encode_token_ids(
+        self,
+        input_ids: List[np.ndarray],
+        batch_size: int,
+        show_progress: bool = True
+    ) -> np.ndarray:
+        """Run the local model directly on pre-tokenized inputs.
+
+        Texts are processed longest-first so each batch needs little padding.
+
+        Args:
+            input_ids: Unpadded token id arrays, one per text.
+            batch_size: Number of texts per forward pass.
+            show_progress: Whether to display progress bar.
+
+        Returns:
+            Array of shape (len(input_ids), EMBEDDING_DIM) with the embeddings.
+        """
+        import torch
+        
+        pad_id = self.model.tokenizer.pad_token_id
+        device = self.model.device
+        embeddings = np.empty((len(input_ids), config.EMBEDDING_DIM), dtype=np.float32)
+        order = np.argsort([-len(ids) for ids in input_ids], kind="stable")
+        
+        starts = range(0, len(order), batch_size)
+        if show_progress:
+            from tqdm import tqdm
+            starts = tqdm(starts, desc="Batches")
+        
+        with torch.inference_mode():
+            for start in starts:
+                batch_idx = order[start:start + batch_size]
+                max_len = max(len(input_ids[i]) for i in batch_idx)
+                
+                ids = np.full((len(batch_idx), max_len), pad_id, dtype=np.int64)
+                mask = np.zeros((len(batch_idx), max_len), dtype=np.int64)
+                for row, i in enumerate(batch_idx):
+                    ids[row, :len(input_ids[i])] = input_ids[i]
+                    mask[row, :len(input_ids[i])] = 1
+                
+                features = {
+                    "input_ids": torch.from_numpy(ids).to(device),
+                    "attention_mask": torch.from_numpy(mask).to(device),
+                }
+                output = self.model(features)["sentence_embedding"]
+                embeddings[batch_idx] = output.float().cpu().numpy()
+        
+        return embeddings
+    
+    async def _embed_documents_api(
+        self,
+        texts: List[str],
+        sink: Callable[[int, np.ndarray], None],
+        concurrency_limit: int,
+        progress=None
+    ):
+        """Embed texts through the HuggingFace API with a fixed pool of workers.
+
+        Each worker pulls (index, text) items from a shared queue and hands the
+        embedding to the sink as soon as it arrives, so at most
+        concurrency_limit embeddings are in flight at any time. Requests run
+        back-to-back and only back off when the API answers with HTTP 429.
+
+        Args:
+            texts: List of document texts to embed.
+            sink: Callback receiving (index, embedding) for each text.
+            concurrency_limit: Number of concurrent worker coroutines.
+            progress: Optional tqdm progress bar to update.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in enumerate(texts):
+            queue.put_nowait(item)
+        
+        async with AsyncInferenceClient(token=config.HUGGINGFACE_API_KEY) as client:
+            
+            async def worker():
+                while True:
+                    try:
+                        idx, text = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    
+                    try:
+                        result = await _feature_extraction_with_backoff(client, text)
+                        emb = np.asarray(result, dtype=np.float32).reshape(-1)
+                    except Exception as e:
+                        console.print(f"[red]✗[/red] Error: {e}")
+                        emb = np.zeros(config.EMBEDDING_DIM, dtype=np.float32)
+                    
+                    sink(idx, emb)
+                    if progress is not None:
+                        progress.update(1)
+            
+            await asyncio.gather(*(worker() for _ in range(concurrency_limit)))
+    
     def test_cross_lingual(self):
         """Test cross-lingual similarity between Turkish and English queries.
 
@@ -237,14 +520,18 @@ class EmbeddingService:
         console.print("\n[cyan]Cross-Lingual Test:[/cyan]")
         console.print("=" * 70)
         
-        for tr, en in test_pairs:
-            tr_emb = self.embed_query(tr)
-            en_emb = self.embed_query(en)
-            
-            similarity = np.dot(tr_emb, en_emb) / (
-                np.linalg.norm(tr_emb) * np.linalg.norm(en_emb)
-            )
-            
+        # Embed all texts at once as (TR, EN, TR, EN, ...) unit vectors
+        flat = [text for pair in test_pairs for text in pair]
+        if self.use_local and self.model:
+            embs = self.model.encode(flat, convert_to_numpy=True, normalize_embeddings=True)
+        else:
+            embs = np.asarray([self.embed_query(text) for text in flat], dtype=np.float32)
+            embs /= np.linalg.norm(embs, axis=1, keepdims=True)
+        
+        # Row-wise dot products of each TR/EN pair = cosine similarities
+        similarities = np.einsum("ij,ij->i", embs[0::2], embs[1::2])
+        
+        for (tr, en), similarity in zip(test_pairs, similarities):
             color = "green" if similarity > 0.75 else "yellow"
             console.print(f"[{color}]TR: {tr:30s} | EN: {en:35s} | Sim: {similarity:.3f}[/{color}]")
         
@@ -17,15 +17,144 @@ Modes:
     - academic: Akademisyen (teknik, detaylı)
 """
 
-from typing import Any, Dict, List, Optional, Tuple
-
-from openai import OpenAI
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import httpx
+import numpy as np
+from openai import OpenAI, Stream
+from openai.types.chat import ChatCompletionChunk
 from rich.console import Console
 
 import config
 
 console = Console()
 
+# Shared HTTP connection pool so every Generator reuses warm keep-alive connections
+_SHARED_HTTP_CLIENT = httpx.Client(
+    limits=httpx.Limits(
+        max_connections=config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    ),
+    timeout=config.DEEPSEEK_TIMEOUT,
+)
+
+# Language instruction prepended to every system prompt
+LANGUAGE_INSTRUCTION = (
+    "Detect the user's question language and reply STRICTLY in that language. "
+    "If the question is multilingual, mirror the dominant language. Do NOT translate.\n\n"
+)
+
+# USER_PROMPT_TEMPLATE split once around its placeholders so the per-call
+# prompt is a plain join instead of a str.format scan over long contexts
+_USER_PROMPT_PREFIX, _USER_PROMPT_REST = config.USER_PROMPT_TEMPLATE.split("{question}", 1)
+_USER_PROMPT_MID, _USER_PROMPT_SUFFIX = _USER_PROMPT_REST.split("{contexts}", 1)
+
+
+@lru_cache(maxsize=64)
+def _format_personalized_prompt(patient_info: str) -> str:
+    """Format the personalized system prompt, cached per patient_info."""
+    return config.SYSTEM_PROMPT_PATIENT_PERSONALIZED.format(patient_info=patient_info)
+
+
+@dataclass(eq=False)
+class Citations(Sequence):
+    """Column-oriented citation metadata for retrieved sources.
+
+    Stores one list per field instead of one dict per source. Indexing or
+    iterating yields citation dicts built on demand, so it can be used
+    anywhere a list of citation dicts is expected.
+
+    Attributes:
+        filenames: Source filename per citation.
+        pages: Page number per citation.
+        sections: Section name per citation.
+        scores: Similarity scores as a float array.
+        excerpts: First 200 characters of each source chunk.
+        has_table: Whether each source chunk contains table data.
+        references: Full reference per citation (None if unavailable).
+        publication_years: Publication year per citation (None if unavailable).
+        citation_formats: Citation format per citation (None if unavailable).
+
+    Examples:
+        >>> citations = Citations.from_results([(doc1, 0.85), (doc2, 0.78)])
+        >>> citations[0]['filename']
+        >>> json.dumps(citations.to_list())
+    """
+
+    filenames: List[str] = field(default_factory=list)
+    pages: List[Any] = field(default_factory=list)
+    sections: List[str] = field(default_factory=list)
+    scores: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    excerpts: List[str] = field(default_factory=list)
+    has_table: List[bool] = field(default_factory=list)
+    references: List[Optional[str]] = field(default_factory=list)
+    publication_years: List[Optional[Any]] = field(default_factory=list)
+    citation_formats: List[Optional[str]] = field(default_factory=list)
+
+    @classmethod
+    def from_results(cls, retrieval_results: List[Tuple[Any, float]]) -> "Citations":
+        """Build citations from (Document, score) retrieval results in one pass.
+
+        Args:
+            retrieval_results: Raw retrieval results as (Document, score) tuples.
+
+        Returns:
+            Citations instance with one entry per result.
+        """
+        citations = cls()
+        scores = []
+        for doc, score in retrieval_results:
+            meta = doc.metadata
+            citations.filenames.append(meta.get("filename", "Unknown"))
+            citations.pages.append(meta.get("page", "?"))
+            citations.sections.append(meta.get("section", "Unknown"))
+            citations.excerpts.append(doc.page_content[:200].strip())
+            citations.has_table.append(meta.get("has_table", False))
+            citations.references.append(meta.get("reference"))
+            citations.publication_years.append(meta.get("publication_year"))
+            citations.citation_formats.append(meta.get("citation_format"))
+            scores.append(score)
+        citations.scores = np.asarray(scores, dtype=np.float64)
+        return citations
+
+    def __len__(self) -> int:
+        return len(self.filenames)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("citation index out of range")
+
+        citation = {
+            "index": i + 1,
+            "filename": self.filenames[i],
+            "page": self.pages[i],
+            "section": self.sections[i],
+            "similarity": float(self.scores[i]),
+            "excerpt": self.excerpts[i],
+            "has_table": self.has_table[i],
+        }
+
+        # Metadata fields from enrichment (only when available)
+        if self.references[i] is not None:
+            citation["reference"] = self.references[i]
+        if self.publication_years[i] is not None:
+            citation["publication_year"] = self.publication_years[i]
+        if self.citation_formats[i] is not None:
+            citation["citation_format"] = self.citation_formats[i]
+
+        return citation
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Convert to a list of citation dicts (e.g. for JSON serialization)."""
+        return list(self)
+
 
 class Generator:
     """DeepSeek R1 Answer Generator with Multi-Mode Support.
@@ -49,6 +178,10 @@ class Generator:
 
     Attributes:
         client: OpenAI client configured for DeepSeek R1 API.
+        _prompt_table: System prompts for modes that do not depend on
+            patient information.
+        _msg_templates: Prebuilt [system, user] message skeletons for modes
+            that do not depend on patient information.
 
     Examples:
         >>> generator = Generator()
@@ -63,33 +196,72 @@ class Generator:
     def __init__(self) -> None:
         """Initialize Generator with DeepSeek R1 client.
 
-        Establishes connection to DeepSeek R1 API and performs a test
-        request to verify connectivity.
+        Creates the DeepSeek R1 client over the process-wide HTTP connection
+        pool. The connectivity test request only runs when
+        config.DEEPSEEK_HEALTHCHECK is enabled; otherwise call healthcheck()
+        explicitly.
 
         Raises:
-            Exception: If API connection fails or credentials are invalid.
+            Exception: If client creation or the enabled health check fails.
         """
         console.print("[cyan]Initializing DeepSeek R1...[/cyan]")
+
+        # Static system prompts are constant, assemble them once
+        self._prompt_table: Dict[str, str] = {
+            "patient": config.SYSTEM_PROMPT_PATIENT,
+            "academic": config.SYSTEM_PROMPT_ACADEMIC,
+        }
+        self._msg_templates: Dict[str, List[Dict[str, Any]]] = {
+            mode: [
+                {"role": "system", "content": LANGUAGE_INSTRUCTION + prompt},
+                {"role": "user", "content": None},
+            ]
+            for mode, prompt in self._prompt_table.items()
+        }
         
         try:
             self.client = OpenAI(
                 api_key=config.DEEPSEEK_API_KEY,
                 base_url=config.DEEPSEEK_BASE_URL,
                 timeout=config.DEEPSEEK_TIMEOUT,
+                http_client=_SHARED_HTTP_CLIENT,
             )
+
+            # Test connection (opt-in, costs one full API round-trip)
+            if config.DEEPSEEK_HEALTHCHECK:
+                if not self.healthcheck():
+                    raise RuntimeError("DeepSeek R1 health check failed")
+            else:
+                console.print("[dim]DeepSeek R1 health check skipped (DEEPSEEK_HEALTHCHECK=False)[/dim]")
             
-            # Test connection
-            test_response = self.client.chat.completions.create(
+            console.print(f"[green]✓[/green] DeepSeek R1 ready: {config.DEEPSEEK_MODEL}")
+        
+        except Exception as e:
+            console.print(f"[red]✗[/red] Failed to initialize DeepSeek R1: {e}")
+            raise
+
+    def healthcheck(self) -> bool:
+        """Verify DeepSeek R1 connectivity with a minimal test request.
+
+        Returns:
+            True if the API answered the test request, False otherwise.
+
+        Examples:
+            >>> generator = Generator()
+            >>> generator.healthcheck()
+            True
+        """
+        try:
+            self.client.chat.completions.create(
                 model=config.DEEPSEEK_MODEL,
                 messages=[{"role": "user", "content": "test"}],
                 max_tokens=5
             )
-            
-            console.print(f"[green]✓[/green] DeepSeek R1 ready: {config.DEEPSEEK_MODEL}")
+            return True
         
         except Exception as e:
-            console.print(f"[red]✗[/red] Failed to initialize DeepSeek R1: {e}")
-            raise
+            console.print(f"[red]✗[/red] DeepSeek R1 health check failed: {e}")
+            return False
     
     def _get_system_prompt(self, mode: str, patient_info: Optional[str] = None) -> str:
         """Get mode-specific system prompt.
@@ -110,25 +282,19 @@ class Generator:
             >>> prompt = generator._get_system_prompt("patient")
             >>> print(prompt[:100])
         """
-        if mode == "patient":
-            return config.SYSTEM_PROMPT_PATIENT
+        prompt = self._prompt_table.get(mode)
+        if prompt is not None:
+            return prompt
         
-        elif mode == "patient_personalized":
+        if mode == "patient_personalized":
             if patient_info and patient_info.strip():
-                return config.SYSTEM_PROMPT_PATIENT_PERSONALIZED.format(
-                    patient_info=patient_info
-                )
-            else:
-                # Fallback to general patient mode if no info provided
-                console.print("[yellow]⚠ [/yellow] No patient info provided, using general patient mode")
-                return config.SYSTEM_PROMPT_PATIENT
-        
-        elif mode == "academic":
-            return config.SYSTEM_PROMPT_ACADEMIC
-        
-        else:
-            console.print(f"[yellow]⚠ [/yellow] Unknown mode '{mode}', defaulting to patient")
+                return _format_personalized_prompt(patient_info)
+            # Fallback to general patient mode if no info provided
+            console.print("[yellow]⚠ [/yellow] No patient info provided, using general patient mode")
             return config.SYSTEM_PROMPT_PATIENT
+        
+        console.print(f"[yellow]⚠ [/yellow] Unknown mode '{mode}', defaulting to patient")
+        return config.SYSTEM_PROMPT_PATIENT
     
     def _get_temperature(self, mode: str) -> float:
         """Get temperature setting for specified mode.
@@ -155,7 +321,9 @@ class Generator:
 
         Uses DeepSeek R1 to generate an answer in the same language as the
         question, based on provided English contexts. Supports multi-mode
-        generation with different prompts and temperatures.
+        generation with different prompts and temperatures. The completion is
+        streamed and aggregated; use stream_generate() to consume tokens as
+        they arrive.
 
         Args:
             question: User question (auto-detects language for response).
@@ -189,53 +357,47 @@ class Generator:
             >>> print(result['answer'])
             >>> print(f"Tokens used: {result['total_tokens']}")
         """
-        # Get mode-specific settings
-        system_prompt = self._get_system_prompt(mode, patient_info)
-        
         if temperature is None:
             temperature = self._get_temperature(mode)
         
-        max_tokens = max_tokens or config.DEEPSEEK_MAX_TOKENS
-        
-        # Build user prompt
-        user_prompt = config.USER_PROMPT_TEMPLATE.format(
-            question=question,
-            contexts=contexts
-        )
-
-        # Combine language detection with system prompt into single system message
-        combined_system_prompt = (
-            "Detect the user's question language and reply STRICTLY in that language. "
-            "If the question is multilingual, mirror the dominant language. Do NOT translate.\n\n"
-            f"{system_prompt}"
-        )
-
-        messages = [
-            {"role": "system", "content": combined_system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
         console.print(f"[cyan]Generating answer (mode: {mode}, temp: {temperature})...[/cyan]")
         
         try:
-            response = self.client.chat.completions.create(
-                model=config.DEEPSEEK_MODEL,
-                messages=messages,
+            # Aggregate the streamed events
+            answer_parts = []
+            reasoning_parts = []
+            usage = None
+            
+            for kind, value in self.stream_generate(
+                question,
+                contexts,
+                mode=mode,
+                patient_info=patient_info,
                 temperature=temperature,
                 max_tokens=max_tokens,
-            )
+                events=True
+            ):
+                if kind == "answer":
+                    answer_parts.append(value)
+                elif kind == "reasoning":
+                    if include_reasoning:
+                        reasoning_parts.append(value)
+                else:  # "usage" (final event)
+                    usage = value
             
-            # Extract response
-            answer = response.choices[0].message.content
-            reasoning = response.choices[0].message.reasoning_content if include_reasoning else None
+            answer = "".join(answer_parts)
+            reasoning = "".join(reasoning_parts)
             
-            # Usage stats
-            usage = response.usage
+            # Usage stats (sent with the final chunk)
+            prompt_tokens = usage.prompt_tokens if usage else 0
+            completion_tokens = usage.completion_tokens if usage else 0
+            total_tokens = usage.total_tokens if usage else 0
             
             result = {
                 "answer": answer,
-                "prompt_tokens": usage.prompt_tokens,
-                "completion_tokens": usage.completion_tokens,
-                "total_tokens": usage.total_tokens,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": total_tokens,
                 "mode": mode,
                 "temperature": temperature,
             }
@@ -243,7 +405,7 @@ class Generator:
             if include_reasoning and reasoning:
                 result["reasoning"] = reasoning
             
-            console.print(f"[green]✓[/green] Generated answer ({usage.completion_tokens} tokens)")
+            console.print(f"[green]✓[/green] Generated answer ({completion_tokens} tokens)")
             
             return result
         
@@ -251,6 +413,127 @@ class Generator:
             console.print(f"[red]✗[/red] Generation failed: {e}")
             raise
     
+    def stream_generate(
+        self,
+        question: str,
+        contexts: str,
+        mode: str = "patient",
+        patient_info: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        events: bool = False
+    ) -> Iterator[Union[str, Tuple[str, Any]]]:
+        """Stream answer tokens as they are generated.
+
+        Same inputs as generate(), but yields answer text fragments as soon as
+        DeepSeek R1 emits them instead of waiting for the full completion.
+        generate() is built on the events=True form.
+
+        Args:
+            question: User question (auto-detects language for response).
+            contexts: Retrieved contexts (English, pre-formatted).
+            mode: Generation mode - 'patient', 'patient_personalized', or 'academic'.
+            patient_info: Patient clinical information for personalized mode.
+            temperature: Override default mode temperature (0.0-1.0).
+            max_tokens: Override default max tokens for generation.
+            events: Yield (kind, value) tuples instead of bare answer text:
+                ("answer", str), ("reasoning", str) and, last, exactly one
+                ("usage", CompletionUsage or None).
+
+        Yields:
+            Answer text fragments in generation order (or events, see above).
+
+        Examples:
+            >>> generator = Generator()
+            >>> for token in generator.stream_generate("HAE nedir?", contexts):
+            ...     print(token, end="", flush=True)
+        """
+        if temperature is None:
+            temperature = self._get_temperature(mode)
+        
+        stream = self._create_stream(
+            self._build_messages(question, contexts, mode, patient_info),
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        
+        usage = None
+        for chunk in stream:
+            # Usage stats are sent with the final chunk
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            
+            delta = chunk.choices[0].delta
+            if not events:
+                if delta.content:
+                    yield delta.content
+                continue
+            
+            if delta.content:
+                yield "answer", delta.content
+            reasoning_part = getattr(delta, "reasoning_content", None)
+            if reasoning_part:
+                yield "reasoning", reasoning_part
+        
+        if events:
+            yield "usage", usage
+    
+    def _build_messages(
+        self,
+        question: str,
+        contexts: str,
+        mode: str,
+        patient_info: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """Build the chat messages (system + user) for a generation request.
+
+        Args:
+            question: User question.
+            contexts: Retrieved contexts (English, pre-formatted).
+            mode: Generation mode.
+            patient_info: Patient clinical information for personalized mode.
+
+        Returns:
+            List of message dicts ready for the chat completions API.
+        """
+        # Build user prompt
+        user_prompt = "".join((
+            _USER_PROMPT_PREFIX, question, _USER_PROMPT_MID, contexts, _USER_PROMPT_SUFFIX
+        ))
+        
+        template = self._msg_templates.get(mode)
+        if template is not None:
+            # Shallow copy: the shared system message is reused, only the user slot changes
+            messages = template.copy()
+            messages[1] = {"role": "user", "content": user_prompt}
+            return messages
+        
+        # Personalized (patient_info varies) and unknown modes are built per call
+        combined_system_prompt = LANGUAGE_INSTRUCTION + self._get_system_prompt(mode, patient_info)
+        
+        return [
+            {"role": "system", "content": combined_system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def _create_stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: Optional[int] = None
+    ) -> Stream[ChatCompletionChunk]:
+        """Open a streaming chat completion that reports usage in its final chunk."""
+        return self.client.chat.completions.create(
+            model=config.DEEPSEEK_MODEL,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens or config.DEEPSEEK_MAX_TOKENS,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+    
     def generate_with_citations(
         self,
         question: str,
@@ -277,7 +560,8 @@ class Generator:
         Returns:
             Dictionary containing:
                 - answer (str): Generated answer text.
-                - citations (List[Dict]): Citation metadata for each source.
+                - citations (Citations): Citation metadata for each source;
+                  behaves like a list of citation dicts.
                 - reasoning (str): R1's reasoning process.
                 - prompt_tokens (int): Tokens in prompt.
                 - completion_tokens (int): Tokens in completion.
@@ -307,30 +591,8 @@ class Generator:
             include_reasoning=True
         )
         
-        # Add citation metadata
-        citations = []
-        for i, (doc, score) in enumerate(retrieval_results, 1):
-            citation = {
-                "index": i,
-                "filename": doc.metadata.get("filename", "Unknown"),
-                "page": doc.metadata.get("page", "?"),
-                "section": doc.metadata.get("section", "Unknown"),
-                "similarity": score,
-                "excerpt": doc.page_content[:200].strip(),
-                "has_table": doc.metadata.get("has_table", False),
-            }
-            
-            # NEW: Add metadata fields from enrichment
-            if "reference" in doc.metadata:
-                citation["reference"] = doc.metadata["reference"]
-            if "publication_year" in doc.metadata:
-                citation["publication_year"] = doc.metadata["publication_year"]
-            if "citation_format" in doc.metadata:
-                citation["citation_format"] = doc.metadata["citation_format"]
-            
-            citations.append(citation)
-        
-        result["citations"] = citations
+        # Add citation metadata (column-oriented, rows are built on access)
+        result["citations"] = Citations.from_results(retrieval_results)
         
         # Optional quality validation
         if validate_quality:
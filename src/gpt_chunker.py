@@ -12,19 +12,67 @@ Chunking Rules:
 Cost: Approximately $0.07 per 10 PDFs (500 pages)
 """
 
+import asyncio
+import hashlib
 import json
+import random
 import re
-from typing import Any, Dict, List, Tuple
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI, RateLimitError
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
 import config
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 console = Console()
 
 
+class _RateLimiter:
+    """Token-bucket throttle for requests-per-minute and tokens-per-minute limits.
+
+    Capacity refills continuously; acquire() waits until both buckets can pay
+    for the next request, so requests are throttled before the API returns 429.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.available_requests = float(requests_per_minute)
+        self.available_tokens = float(tokens_per_minute)
+        self.last_update = time.monotonic()
+
+    async def acquire(self, tokens: int):
+        tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            now = time.monotonic()
+            elapsed = now - self.last_update
+            self.last_update = now
+            self.available_requests = min(
+                self.requests_per_minute,
+                self.available_requests + self.requests_per_minute * elapsed / 60
+            )
+            self.available_tokens = min(
+                self.tokens_per_minute,
+                self.available_tokens + self.tokens_per_minute * elapsed / 60
+            )
+            
+            if self.available_requests >= 1 and self.available_tokens >= tokens:
+                self.available_requests -= 1
+                self.available_tokens -= tokens
+                return
+            
+            await asyncio.sleep(0.05)
+
+
 class GPTGuidedChunker:
     """Intelligent text chunking with GPT-4o-mini.
 
@@ -47,23 +95,77 @@ Rules:
 3. Optimal chunk size: 500-1500 characters (but prioritize meaning over size)
 4. Don't break mid-sentence or mid-paragraph unless absolutely necessary
 
+You may receive several independent texts, each marked "TEXT <id>". Split each one separately.
+
 Output format (JSON):
 {
-  "split_indices": [0, 523, 1247, 2103],
-  "reasoning": "Split at section boundary, then at topic change..."
+  "results": [
+    {"id": 0, "split_indices": [0, 523, 1247, 2103]},
+    {"id": 1, "split_indices": [0, 812]}
+  ]
 }
 
-split_indices = character positions where splits should occur (start of each chunk)
+split_indices = character positions within that text where splits should occur (start of each chunk)
 """
 
-    USER_PROMPT_TEMPLATE = """Analyze this text and decide where to split it into chunks:
+    USER_PROMPT_TEMPLATE = """Analyze these {text_count} texts and decide where to split each into chunks:
 
-TEXT:
-{text}
+{texts}
 
-CHARACTER COUNT: {char_count}
+Decide the optimal split points. Return JSON with one results entry per TEXT id."""
 
-Decide the optimal split points. Return JSON with split_indices."""
+    TEXT_BLOCK_TEMPLATE = """TEXT {id} (CHARACTER COUNT: {char_count}):
+{text}
+---"""
+
+    MAX_CHARS = 12000  # ~3K tokens per GPT request (context limit)
+    SEGMENT_WINDOW = 500  # Look this far around MAX_CHARS for a paragraph/sentence boundary
+    SEGMENT_OVERLAP = 300  # Context carried from the previous segment (splits there are dropped)
+    
+    # Structured output: the response is guaranteed to parse into this shape
+    RESPONSE_FORMAT = {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "splits",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "results": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "id": {"type": "integer"},
+                                "split_indices": {"type": "array", "items": {"type": "integer"}},
+                            },
+                            "required": ["id", "split_indices"],
+                            "additionalProperties": False,
+                        },
+                    },
+                },
+                "required": ["results"],
+                "additionalProperties": False,
+            },
+        },
+    }
+    
+    # One pass for all section headers; the matching group names the section
+    _SECTION_RE = re.compile(
+        r"^(?P<abstract>abstract|özet)\s*[:|\n]"
+        r"|^(?P<references>references|bibliography|kaynaklar)"
+        r"|^(?P<appendix>appendix|ek)\s*[:\d]",
+        re.IGNORECASE
+    )
+    
+    TABLE_MARKERS = (
+        "[TABLE DATA]",
+        "| --- | --- |",
+        "\t|\t",  # Tab-separated
+    )
+    # Single-pass fallback scanner when pyahocorasick isn't installed
+    _TABLE_MARKER_RE = re.compile("|".join(re.escape(marker) for marker in TABLE_MARKERS))
+    PROMPT_VERSION = 2  # Bump whenever SYSTEM_PROMPT / templates change (invalidates split cache)
 
     def __init__(self, api_key: str = None):
         self.api_key = api_key or config.OPENAI_API_KEY
@@ -72,6 +174,8 @@ Decide the optimal split points. Return JSON with split_indices."""
             raise ValueError("OpenAI API key required for GPT-guided chunking")
         
         self.client = OpenAI(api_key=self.api_key)
+        self._table_automaton = self._build_table_automaton()
+        self._split_cache_dir = Path(config.CACHE_DIR) / "gpt_chunker"
         
         # Stats
         self.total_tokens_used = 0
@@ -88,21 +192,9 @@ Decide the optimal split points. Return JSON with split_indices."""
         Returns:
             Section type: 'abstract', 'references', 'appendix', or 'content'.
         """
-        text_lower = text.lower().strip()[:200]  # First 200 chars
-
-        # Abstract detection
-        if re.match(r"^(abstract|özet)\s*[:|\n]", text_lower):
-            return "abstract"
-        
-        # References detection
-        if re.match(r"^(references|bibliography|kaynaklar)", text_lower):
-            return "references"
-        
-        # Appendix detection
-        if re.match(r"^(appendix|ek)\s*[:\d]", text_lower):
-            return "appendix"
+        match = self._SECTION_RE.match(text.lstrip()[:200])  # First 200 chars
         
-        return "content"
+        return match.lastgroup if match else "content"
     
     def _has_table_markers(self, text: str) -> bool:
         """Detect if text contains table markers.
@@ -113,74 +205,347 @@ Decide the optimal split points. Return JSON with split_indices."""
         Returns:
             True if table markers are detected, False otherwise.
         """
-        table_markers = [
-            "[TABLE DATA]",
-            "| --- | --- |",
-            "\t|\t",  # Tab-separated
-        ]
+        # One pass over the text for all markers, stopping at the first hit
+        if self._table_automaton is not None:
+            return next(self._table_automaton.iter(text), None) is not None
+        
+        return self._TABLE_MARKER_RE.search(text) is not None
+    
+    def _build_table_automaton(self):
+        """Aho-Corasick automaton over TABLE_MARKERS (None without pyahocorasick)."""
+        if not AHOCORASICK_AVAILABLE:
+            return None
         
-        return any(marker in text for marker in table_markers)
+        automaton = ahocorasick.Automaton()
+        for marker in self.TABLE_MARKERS:
+            automaton.add_word(marker, marker)
+        automaton.make_automaton()
+        return automaton
     
-    def _ask_gpt_for_splits(self, text: str) -> List[int]:
+    def _split_request(self, texts: List[str]) -> Dict[str, Any]:
+        """Build chat completion arguments asking GPT where to split texts.
+
+        Several texts are packed into one prompt, each tagged with its id.
         """
-        Ask GPT-4o-mini: Where should we split this text?
+        text_blocks = "\n".join(
+            self.TEXT_BLOCK_TEMPLATE.format(id=i, char_count=len(text), text=text)
+            for i, text in enumerate(texts)
+        )
+        return {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {
+                    "role": "user",
+                    "content": self.USER_PROMPT_TEMPLATE.format(
+                        texts=text_blocks,
+                        text_count=len(texts)
+                    )
+                }
+            ],
+            "response_format": self.RESPONSE_FORMAT,
+            "temperature": 0.3,
+        }
+    
+    @staticmethod
+    def _parse_splits(content: str, count: int) -> List[Optional[List[int]]]:
+        """Map a packed GPT response back to split indices per text id.
+
+        Returns:
+            Split indices per text, or None where the response has no entry.
+        """
+        splits: List[Optional[List[int]]] = [None] * count
+        for entry in json.loads(content).get("results", []):
+            text_id = entry.get("id")
+            if isinstance(text_id, int) and 0 <= text_id < count:
+                splits[text_id] = entry.get("split_indices", [0])
+        return splits
+    
+    def _record_usage(
+        self,
+        prompt_tokens: int,
+        completion_tokens: int,
+        price_factor: float = 1.0
+    ):
+        """Add a response's token usage to the running stats."""
+        self.total_tokens_used += prompt_tokens + completion_tokens
+        self.total_cost += price_factor * (prompt_tokens * 0.15 / 1_000_000 + 
+                                           completion_tokens * 0.60 / 1_000_000)
+    
+    @staticmethod
+    def _fallback_splits(text: str) -> List[int]:
+        """Fallback: simple split every 1000 chars."""
+        return list(range(0, len(text), 1000))
+    
+    def _split_cache_path(self, text: str) -> Path:
+        h = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return self._split_cache_dir / h[:2] / f"{h}.json"
+    
+    def _load_cached_splits(self, text: str) -> Optional[List[int]]:
+        """Return cached GPT split indices for text, or None on a miss.
+
+        Entries written by another model or prompt version are ignored.
         """
-        # First do rough split for very long text (GPT context limit)
-        MAX_CHARS = 12000  # ~3K tokens
+        if not config.GPT_CHUNKING_CACHE:
+            return None
+        
+        try:
+            entry = json.loads(self._split_cache_path(text).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        
+        if entry.get("model") != "gpt-4o-mini" or entry.get("prompt_version") != self.PROMPT_VERSION:
+            return None
+        return entry.get("split_indices")
+    
+    def _store_cached_splits(self, text: str, split_indices: List[int]):
+        if not config.GPT_CHUNKING_CACHE:
+            return
+        
+        path = self._split_cache_path(text)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "split_indices": split_indices,
+            "model": "gpt-4o-mini",
+            "prompt_version": self.PROMPT_VERSION,
+        }), encoding="utf-8")
+    
+    def _lookup_splits(
+        self,
+        segments: List[Tuple[int, int, str]]
+    ) -> Tuple[List[Optional[List[int]]], List[int]]:
+        """Look segments up in the split cache.
 
-        if len(text) > MAX_CHARS:
-            # Analyze first MAX_CHARS, then recurse
-            splits = self._ask_gpt_for_splits(text[:MAX_CHARS])
-            remaining_splits = self._ask_gpt_for_splits(text[MAX_CHARS:])
-            return splits + [s + MAX_CHARS for s in remaining_splits]
+        Returns:
+            (split indices per segment or None, indices of cache misses)
+        """
+        segment_splits = [self._load_cached_splits(segment) for _, _, segment in segments]
+        misses = [j for j, split_indices in enumerate(segment_splits) if split_indices is None]
+        
+        if len(misses) < len(segments):
+            console.print(f"[dim]{len(segments) - len(misses)} segments served from split cache[/dim]")
+        
+        return segment_splits, misses
+    
+    def _with_fallback(
+        self,
+        texts: List[str],
+        splits: List[Optional[List[int]]]
+    ) -> List[List[int]]:
+        """Cache GPT split indices and replace missing ones with the fixed-size fallback."""
+        for text, split_indices in zip(texts, splits):
+            if split_indices is not None:
+                self._store_cached_splits(text, split_indices)
+        
+        return [
+            split_indices if split_indices is not None else self._fallback_splits(text)
+            for text, split_indices in zip(texts, splits)
+        ]
+    
+    def _ask_gpt_for_splits(self, texts: List[str]) -> List[List[int]]:
+        """
+        Ask GPT-4o-mini: Where should we split each of these texts?
         
+        All texts go out in a single request (see _pack).
+        """
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": self.SYSTEM_PROMPT},
-                    {
-                        "role": "user",
-                        "content": self.USER_PROMPT_TEMPLATE.format(
-                            text=text,
-                            char_count=len(text)
-                        )
-                    }
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.3,
-                max_tokens=500,
+            response = self.client.chat.completions.create(**self._split_request(texts))
+            self._record_usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+            splits = self._parse_splits(response.choices[0].message.content, len(texts))
+        
+        except Exception as e:
+            console.print(f"[red]✗[/red] GPT error: {e}")
+            splits = [None] * len(texts)
+        
+        return self._with_fallback(texts, splits)
+    
+    def _segment(self, texts: List[str]) -> List[Tuple[int, int, str]]:
+        """Cut texts into (text_idx, offset, segment) at natural boundaries.
+
+        Long texts are cut near every MAX_CHARS at the last paragraph break,
+        line break or sentence end within +/- SEGMENT_WINDOW chars (hard cut
+        only if there is none). Every segment after the first starts
+        SEGMENT_OVERLAP chars before its cut, so GPT sees the preceding
+        context; _reassemble drops splits that fall inside that overlap.
+        """
+        segments = []
+        for text_idx, text in enumerate(texts):
+            start = 0  # First position this segment is responsible for
+            while start < len(text):
+                offset = max(0, start - self.SEGMENT_OVERLAP)
+                
+                if len(text) - start <= self.MAX_CHARS + self.SEGMENT_WINDOW:
+                    end = len(text)
+                else:
+                    end = self._find_boundary(text, start + self.MAX_CHARS)
+                
+                segments.append((text_idx, offset, text[offset:end]))
+                start = end
+        
+        return segments
+    
+    def _find_boundary(self, text: str, target: int) -> int:
+        """Position just after the best boundary within SEGMENT_WINDOW of target."""
+        lo, hi = target - self.SEGMENT_WINDOW, target + self.SEGMENT_WINDOW
+        for separator in ("\n\n", "\n", ". "):
+            pos = text.rfind(separator, lo, hi)
+            if pos != -1:
+                return pos + len(separator)
+        return target
+    
+    @staticmethod
+    def _pack(segments: List[Tuple[int, int, str]], indices: List[int]) -> List[List[int]]:
+        """Greedily bin-pack segments into prompts by character count.
+
+        First-fit decreasing: each segment (longest first) joins the first
+        pack with room under config.GPT_CHUNKING_PACK_CHARS and
+        config.GPT_CHUNKING_PACK_SIZE. Oversized segments get their own pack.
+
+        Returns:
+            Lists of segment indices, one list per request.
+        """
+        packs: List[List[int]] = []
+        pack_chars: List[int] = []
+        order = sorted(indices, key=lambda j: len(segments[j][2]), reverse=True)
+        
+        for j in order:
+            size = len(segments[j][2])
+            for p, pack in enumerate(packs):
+                if (len(pack) < config.GPT_CHUNKING_PACK_SIZE
+                        and pack_chars[p] + size <= config.GPT_CHUNKING_PACK_CHARS):
+                    pack.append(j)
+                    pack_chars[p] += size
+                    break
+            else:
+                packs.append([j])
+                pack_chars.append(size)
+        
+        return packs
+    
+    def _reassemble(
+        self,
+        text_count: int,
+        segments: List[Tuple[int, int, str]],
+        segment_splits: List[List[int]]
+    ) -> List[List[int]]:
+        """Shift segment-local split indices back to per-text positions.
+
+        Splits inside a segment's leading overlap belong to the previous
+        segment and are dropped, so boundaries aren't duplicated.
+        """
+        splits: List[List[int]] = [[] for _ in range(text_count)]
+        for (text_idx, offset, _), local_splits in zip(segments, segment_splits):
+            owned_from = offset + self.SEGMENT_OVERLAP if offset > 0 else 0
+            splits[text_idx].extend(
+                s + offset for s in local_splits if s + offset >= owned_from
             )
+        return [sorted(set(text_splits)) for text_splits in splits]
+    
+    def _request_splits(self, texts: List[str]) -> List[List[int]]:
+        """Segment, pack and synchronously request split indices for texts."""
+        segments = self._segment(texts)
+        segment_splits, misses = self._lookup_splits(segments)
+        
+        for pack in self._pack(segments, misses):
+            pack_splits = self._ask_gpt_for_splits([segments[j][2] for j in pack])
+            for j, split_indices in zip(pack, pack_splits):
+                segment_splits[j] = split_indices
+        
+        return self._reassemble(len(texts), segments, segment_splits)
+    
+    async def _ask_gpt_for_splits_async(
+        self,
+        client: AsyncOpenAI,
+        texts: List[str],
+        limiter: _RateLimiter
+    ) -> List[List[int]]:
+        """Async variant of _ask_gpt_for_splits for one packed request.
+
+        Waits for rate-limit budget before each attempt and retries HTTP 429
+        responses with exponential backoff and jitter.
+        """
+        request = self._split_request(texts)
+        # Rough token estimate (~4 chars/token) for the prompt, plus ~100
+        # completion tokens per text (a list of split indices)
+        estimated_tokens = (
+            (len(self.SYSTEM_PROMPT) + sum(len(text) for text in texts)) // 4
+            + 100 * len(texts)
+        )
+        
+        for attempt in range(config.GPT_CHUNKING_MAX_RETRIES):
+            await limiter.acquire(estimated_tokens)
+            try:
+                response = await client.chat.completions.create(**request)
+                self._record_usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+                splits = self._parse_splits(response.choices[0].message.content, len(texts))
+                return self._with_fallback(texts, splits)
             
-            # Parse response
-            result = json.loads(response.choices[0].message.content)
-            split_indices = result.get("split_indices", [0])
-            
-            # Stats
-            usage = response.usage
-            self.total_tokens_used += usage.total_tokens
-            self.total_cost += (usage.prompt_tokens * 0.15 / 1_000_000 + 
-                               usage.completion_tokens * 0.60 / 1_000_000)
+            except RateLimitError:
+                delay = min(60, 2 ** attempt) * (1 + random.random())
+                console.print(f"[yellow]⚠[/yellow] Rate limited, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
             
-            return split_indices
+            except Exception as e:
+                console.print(f"[red]✗[/red] GPT error: {e}")
+                return self._with_fallback(texts, [None] * len(texts))
         
-        except Exception as e:
-            console.print(f"[red]✗[/red] GPT error: {e}")
-            # Fallback: simple split every 1000 chars
-            return list(range(0, len(text), 1000))
+        console.print("[red]✗[/red] GPT error: rate limit retries exhausted")
+        return self._with_fallback(texts, [None] * len(texts))
     
-    def chunk_text(
+    async def _ask_gpt_for_splits_batch(
         self,
-        text: str,
-        metadata: Dict[str, Any] = None
-    ) -> List[Dict[str, Any]]:
+        texts: List[str],
+        num_concurrent: int
+    ) -> List[List[int]]:
+        """Ask GPT for split points of many texts concurrently.
+
+        Each text is cut into ~MAX_CHARS segments up front (see _segment),
+        segments are packed several per prompt, all packs are submitted
+        concurrently under a semaphore and a shared RPM/TPM budget, and
+        segment-local indices are shifted back by their segment offset.
+
+        Args:
+            texts: Texts to split.
+            num_concurrent: Maximum number of in-flight requests.
+
+        Returns:
+            List of split indices per text, in input order.
         """
-        Main chunking function
+        segments = self._segment(texts)
+        segment_splits, misses = self._lookup_splits(segments)
+        packs = self._pack(segments, misses)
+        
+        semaphore = asyncio.Semaphore(num_concurrent)
+        limiter = _RateLimiter(config.GPT_CHUNKING_RPM, config.GPT_CHUNKING_TPM)
+        client = AsyncOpenAI(api_key=self.api_key)
+        
+        async def run(pack: List[int]) -> List[List[int]]:
+            async with semaphore:
+                return await self._ask_gpt_for_splits_async(
+                    client, [segments[j][2] for j in pack], limiter
+                )
         
+        try:
+            pack_splits = await asyncio.gather(*(run(pack) for pack in packs))
+        finally:
+            await client.close()
+        
+        for pack, splits in zip(packs, pack_splits):
+            for j, split_indices in zip(pack, splits):
+                segment_splits[j] = split_indices
+        
+        return self._reassemble(len(texts), segments, segment_splits)
+    
+    def _chunk_by_rules(
+        self,
+        text: str,
+        metadata: Dict[str, Any]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Apply the rule-based chunking strategies (rules 1-3).
+
         Returns:
-            List of {"content": str, "metadata": dict, "chunk_strategy": str}
+            Chunks if a rule applied, or None if the text needs GPT splits.
         """
-        metadata = metadata or {}
         section_type = self._classify_section(text)
 
         # Rule 1: Abstract → Single chunk
@@ -205,12 +570,16 @@ Decide the optimal split points. Return JSON with split_indices."""
                 "metadata": {**metadata, "has_table": True},
                 "chunk_strategy": "single_table"
             }]
-
-        # Rule 4: Normal content → Ask GPT
-        console.print(f"[cyan]→[/cyan] Asking GPT-4o-mini for optimal splits...")
-        split_indices = self._ask_gpt_for_splits(text)
         
-        # Create chunks
+        return None
+    
+    def _build_gpt_chunks(
+        self,
+        text: str,
+        split_indices: List[int],
+        metadata: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Cut text at GPT split indices into chunk dicts."""
         chunks = []
         for i in range(len(split_indices)):
             start = split_indices[i]
@@ -232,6 +601,200 @@ Decide the optimal split points. Return JSON with split_indices."""
         console.print(f"[green]✓[/green] Created {len(chunks)} GPT-guided chunks")
         return chunks
     
+    def chunk_text(
+        self,
+        text: str,
+        metadata: Dict[str, Any] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Main chunking function
+        
+        Returns:
+            List of {"content": str, "metadata": dict, "chunk_strategy": str}
+        """
+        metadata = metadata or {}
+        
+        chunks = self._chunk_by_rules(text, metadata)
+        if chunks is not None:
+            return chunks
+
+        # Rule 4: Normal content → Ask GPT
+        console.print(f"[cyan]→[/cyan] Asking GPT-4o-mini for optimal splits...")
+        split_indices = self._request_splits([text])[0]
+        
+        return self._build_gpt_chunks(text, split_indices, metadata)
+    
+    def chunk_text_batch(
+        self,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]] = None,
+        num_concurrent: int = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Chunk many texts, issuing GPT split requests concurrently.
+
+        Same rules as chunk_text, but all texts that need GPT splits are sent
+        through an async client at once instead of one blocking call at a
+        time, throttled by config.GPT_CHUNKING_RPM / GPT_CHUNKING_TPM.
+
+        Args:
+            texts: Texts to chunk.
+            metadatas: Optional metadata dict per text.
+            num_concurrent: Max in-flight requests
+                (default: config.GPT_CHUNKING_CONCURRENCY).
+
+        Returns:
+            List of chunk lists, one per input text, in input order.
+
+        Examples:
+            >>> chunker = GPTGuidedChunker()
+            >>> results = chunker.chunk_text_batch(pages, metadatas)
+            >>> len(results) == len(pages)
+            True
+        """
+        metadatas = metadatas or [{} for _ in texts]
+        num_concurrent = num_concurrent or config.GPT_CHUNKING_CONCURRENCY
+        
+        results: List[Optional[List[Dict[str, Any]]]] = [
+            self._chunk_by_rules(text, metadata)
+            for text, metadata in zip(texts, metadatas)
+        ]
+        pending = [i for i, chunks in enumerate(results) if chunks is None]
+        
+        if pending:
+            console.print(
+                f"[cyan]→[/cyan] Asking GPT-4o-mini for optimal splits "
+                f"({len(pending)} texts, {num_concurrent} concurrent)..."
+            )
+            all_splits = asyncio.run(
+                self._ask_gpt_for_splits_batch([texts[i] for i in pending], num_concurrent)
+            )
+            for i, split_indices in zip(pending, all_splits):
+                results[i] = self._build_gpt_chunks(texts[i], split_indices, metadatas[i])
+        
+        return results
+    
+    def chunk_corpus_via_batch(
+        self,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]] = None,
+        poll_interval: float = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Chunk a corpus through the OpenAI Batch API (offline ingestion).
+
+        Segments needing GPT splits are packed into requests (see _pack),
+        one JSONL line per request; the batch is billed at 50% of the
+        synchronous price and may take up to 24h. Segments without a usable result fall back to fixed
+        1000-char splits. Use chunk_text / chunk_text_batch for interactive
+        work.
+
+        Args:
+            texts: Texts to chunk.
+            metadatas: Optional metadata dict per text.
+            poll_interval: Seconds between status checks
+                (default: config.GPT_CHUNKING_BATCH_POLL_INTERVAL).
+
+        Returns:
+            List of chunk lists, one per input text, in input order.
+        """
+        metadatas = metadatas or [{} for _ in texts]
+        poll_interval = poll_interval or config.GPT_CHUNKING_BATCH_POLL_INTERVAL
+        
+        results: List[Optional[List[Dict[str, Any]]]] = [
+            self._chunk_by_rules(text, metadata)
+            for text, metadata in zip(texts, metadatas)
+        ]
+        pending = [i for i, chunks in enumerate(results) if chunks is None]
+        
+        if not pending:
+            return results
+        
+        segments = self._segment([texts[i] for i in pending])
+        segment_splits, misses = self._lookup_splits(segments)
+        packs = self._pack(segments, misses)
+        
+        if packs:
+            self._run_split_batch(segments, packs, segment_splits, poll_interval)
+        
+        splits = self._reassemble(len(pending), segments, segment_splits)
+        for text_idx, i in enumerate(pending):
+            results[i] = self._build_gpt_chunks(texts[i], splits[text_idx], metadatas[i])
+        
+        return results
+    
+    def _run_split_batch(
+        self,
+        segments: List[Tuple[int, int, str]],
+        packs: List[List[int]],
+        segment_splits: List[Optional[List[int]]],
+        poll_interval: float
+    ):
+        """Submit packed split requests as one Batch API job and wait for it.
+
+        Fills segment_splits in place for every segment of every pack.
+        """
+        lines = [
+            json.dumps({
+                "custom_id": f"pack{p}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._split_request([segments[j][2] for j in pack]),
+            }, ensure_ascii=False)
+            for p, pack in enumerate(packs)
+        ]
+        
+        # Upload + submit
+        batch_file = self.client.files.create(
+            file=("gpt_chunker_batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        console.print(
+            f"[cyan]→[/cyan] Submitted batch {batch.id} "
+            f"({len(packs)} requests for {sum(len(pack) for pack in packs)} segments)"
+        )
+        
+        # Poll until finished
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+        
+        if batch.status != "completed":
+            console.print(f"[red]✗[/red] Batch {batch.id} {batch.status}, using fallback splits")
+        
+        # Parse results by custom_id
+        responses: Dict[str, Dict[str, Any]] = {}
+        if batch.output_file_id:
+            for line in self.client.files.content(batch.output_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") == 200:
+                    responses[record["custom_id"]] = response["body"]
+        
+        for p, pack in enumerate(packs):
+            pack_texts = [segments[j][2] for j in pack]
+            body = responses.get(f"pack{p}")
+            try:
+                splits = self._parse_splits(body["choices"][0]["message"]["content"], len(pack))
+                
+                # Stats (Batch API: 50% of synchronous price)
+                usage = body["usage"]
+                self._record_usage(usage["prompt_tokens"], usage["completion_tokens"], 0.5)
+            except (TypeError, KeyError, IndexError, json.JSONDecodeError):
+                splits = [None] * len(pack)
+            
+            for j, split_indices in zip(pack, self._with_fallback(pack_texts, splits)):
+                segment_splits[j] = split_indices
+        
+        failed = len(packs) - len(responses)
+        if failed:
+            console.print(f"[yellow]⚠[/yellow] {failed} requests without batch result (fallback splits)")
+    
     def get_stats(self) -> Dict[str, Any]:
         """
         Token usage and cost statistics
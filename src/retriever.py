@@ -13,6 +13,7 @@ Features:
 
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 from langchain_core.documents import Document
 from rich.console import Console
 
@@ -21,9 +22,89 @@ from .embedding_service import EmbeddingService
 from .vector_store import FaissVectorStore
 import config
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 console = Console()
 
 
+if NUMBA_AVAILABLE:
+    
+    @njit(cache=True)
+    def _tokens_hash64(buf: np.ndarray) -> np.ndarray:
+        """Sorted unique 64-bit FNV-1a hashes of the whitespace-separated,
+        ASCII-lowercased tokens in a UTF-8 byte buffer."""
+        hashes = np.empty(len(buf) // 2 + 1, dtype=np.uint64)
+        n = 0
+        h = np.uint64(14695981039346656037)
+        in_token = False
+        
+        for b in buf:
+            if b == 32 or 9 <= b <= 13:  # ASCII whitespace
+                if in_token:
+                    hashes[n] = h
+                    n += 1
+                    h = np.uint64(14695981039346656037)
+                    in_token = False
+            else:
+                if 65 <= b <= 90:  # A-Z
+                    b += 32
+                h = (h ^ np.uint64(b)) * np.uint64(1099511628211)
+                in_token = True
+        
+        if in_token:
+            hashes[n] = h
+            n += 1
+        
+        return np.unique(hashes[:n])
+    
+    @njit(cache=True)
+    def _jaccard_sorted(a: np.ndarray, b: np.ndarray) -> float:
+        """Jaccard similarity of two sorted unique uint64 arrays (two-pointer merge)."""
+        if len(a) == 0 or len(b) == 0:
+            return 0.0
+        
+        i = j = intersection = 0
+        while i < len(a) and j < len(b):
+            if a[i] == b[j]:
+                intersection += 1
+                i += 1
+                j += 1
+            elif a[i] < b[j]:
+                i += 1
+            else:
+                j += 1
+        
+        return intersection / (len(a) + len(b) - intersection)
+    
+    @njit(cache=True)
+    def _greedy_dedup(flat: np.ndarray, offsets: np.ndarray, threshold: float) -> np.ndarray:
+        """Keep-first dedup over concatenated hash arrays; returns a keep mask."""
+        count = len(offsets) - 1
+        keep = np.zeros(count, dtype=np.bool_)
+        kept = np.empty(count, dtype=np.int64)
+        n_kept = 0
+        
+        for i in range(count):
+            a = flat[offsets[i]:offsets[i + 1]]
+            is_duplicate = False
+            for t in range(n_kept):
+                j = kept[t]
+                if _jaccard_sorted(a, flat[offsets[j]:offsets[j + 1]]) > threshold:
+                    is_duplicate = True
+                    break
+            
+            if not is_duplicate:
+                keep[i] = True
+                kept[n_kept] = i
+                n_kept += 1
+        
+        return keep
+
+
 class Retriever:
     """Intelligent retrieval system for cross-lingual RAG.
 
@@ -56,11 +137,15 @@ class Retriever:
         """
         self.vector_store = vector_store
         self.embedding_service = embedding_service
+        
+        # Prefix token hashes by id(doc) -> (doc, hashes), kept out of doc.metadata
+        self._prefix_hashes_cache: Dict[int, Tuple[Document, np.ndarray]] = {}
 
         # Lazy load if not provided
         if self.vector_store is None:
             console.print("[cyan]Loading vector store...[/cyan]")
-            self.vector_store = FaissVectorStore.load()
+            # Search-only: memory-map the index when configured
+            self.vector_store = FaissVectorStore.load(mmap=config.FAISS_MMAP_INDEX)
 
         if self.embedding_service is None:
             console.print("[cyan]Loading embedding service...[/cyan]")
@@ -73,7 +158,8 @@ class Retriever:
         query: str,
         k: Optional[int] = None,
         threshold: Optional[float] = None,
-        deduplicate: bool = True
+        deduplicate: bool = True,
+        query_variants: Optional[List[str]] = None
     ) -> List[Tuple[Document, float]]:
         """Retrieve relevant documents for a user query.
 
@@ -84,7 +170,11 @@ class Retriever:
             query: User question in Turkish or English.
             k: Number of results to return. Defaults to config.TOP_K.
             threshold: Minimum similarity score (0-1). Defaults to config.SIMILARITY_THRESHOLD.
-            deduplicate: Whether to remove near-duplicate results.
+            deduplicate: Whether to remove near-duplicate results. Skipped
+                when the vector store was near-duplicate filtered at ingest.
+            query_variants: Optional rewrites of the query (e.g. translations,
+                HyDE answers). All queries are searched in one batched FAISS
+                call and each document keeps its best score.
 
         Returns:
             List of (Document, similarity_score) tuples sorted by score descending.
@@ -98,16 +188,22 @@ class Retriever:
         k = k or config.TOP_K
         threshold = threshold if threshold is not None else config.SIMILARITY_THRESHOLD
         
-        # Embed query
+        # Near-duplicates were already dropped at ingest: no over-fetch needed
+        deduplicate = deduplicate and not self.vector_store.deduplicated
+        
+        # Embed query and its variants (one batched encode)
         console.print(f"[cyan]Query:[/cyan] {query[:100]}...")
-        query_embedding = self.embedding_service.embed_query(query)
+        queries = [query, *(query_variants or [])]
+        query_embeddings = self.embedding_service.embed_queries(queries)
         
-        # Search
-        results = self.vector_store.search(
-            query_embedding,
-            k=k * 2 if deduplicate else k,  # Get more if deduplicating
+        # Search (one batched call for all variants)
+        search_k = k * 2 if deduplicate else k  # Get more if deduplicating
+        per_query = self.vector_store.search_batch(
+            query_embeddings,
+            k=search_k,
             threshold=threshold
         )
+        results = self._merge_results(per_query, search_k) if query_variants else per_query[0]
         
         # Deduplicate if needed
         if deduplicate:
@@ -127,6 +223,67 @@ class Retriever:
         
         return results
     
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        k: Optional[int] = None,
+        threshold: Optional[float] = None,
+        deduplicate: bool = True
+    ) -> List[List[Tuple[Document, float]]]:
+        """Retrieve documents for several independent queries at once.
+
+        All queries are embedded in one batched pass and searched with one
+        FAISS call, instead of one embedding + search per query.
+
+        Args:
+            queries: User questions in Turkish or English.
+            k: Number of results per query. Defaults to config.TOP_K.
+            threshold: Minimum similarity score (0-1). Defaults to config.SIMILARITY_THRESHOLD.
+            deduplicate: Whether to remove near-duplicate results (see retrieve).
+
+        Returns:
+            One list of (Document, similarity_score) tuples per query, each
+            sorted by score descending.
+        """
+        k = k or config.TOP_K
+        threshold = threshold if threshold is not None else config.SIMILARITY_THRESHOLD
+        deduplicate = deduplicate and not self.vector_store.deduplicated
+        
+        console.print(f"[cyan]Queries:[/cyan] {len(queries)}")
+        query_embeddings = self.embedding_service.embed_queries(queries)
+        
+        search_k = k * 2 if deduplicate else k
+        per_query = self.vector_store.search_batch(
+            query_embeddings,
+            k=search_k,
+            threshold=threshold
+        )
+        
+        if deduplicate:
+            per_query = [self._deduplicate_results(results)[:k] for results in per_query]
+        
+        console.print(
+            f"[green]✓[/green] Retrieved {sum(len(r) for r in per_query)} documents "
+            f"for {len(queries)} queries"
+        )
+        
+        return per_query
+    
+    @staticmethod
+    def _merge_results(
+        per_query: List[List[Tuple[Document, float]]],
+        k: int
+    ) -> List[Tuple[Document, float]]:
+        """Merge per-query results, keeping each document's best score."""
+        best: Dict[int, Tuple[Document, float]] = {}
+        for results in per_query:
+            for doc, score in results:
+                key = id(doc)
+                if key not in best or score > best[key][1]:
+                    best[key] = (doc, score)
+        
+        return sorted(best.values(), key=lambda item: item[1], reverse=True)[:k]
+    
     def _deduplicate_results(
         self,
         results: List[Tuple[Document, float]],
@@ -152,23 +309,17 @@ class Retriever:
         if len(results) <= 1:
             return results
         
-        deduplicated = []
-        seen_content = []
+        if NUMBA_AVAILABLE:
+            # Compiled path: cached per-document token hashes, no Python sets
+            hash_arrays = [self._prefix_hashes(doc) for doc, _ in results]
+            offsets = np.zeros(len(hash_arrays) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(h) for h in hash_arrays])
+            keep = _greedy_dedup(np.concatenate(hash_arrays), offsets, similarity_threshold)
+            kept = np.flatnonzero(keep).tolist()
+        else:
+            kept = self._dedup_keep(results, similarity_threshold)
         
-        for doc, score in results:
-            content = doc.page_content
-            
-            # Check against existing
-            is_duplicate = False
-            for seen in seen_content:
-                overlap = self._content_overlap(content, seen)
-                if overlap > similarity_threshold:
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
-                deduplicated.append((doc, score))
-                seen_content.append(content)
+        deduplicated = [results[i] for i in kept]
         
         if len(deduplicated) < len(results):
             console.print(
@@ -178,6 +329,39 @@ class Retriever:
         
         return deduplicated
     
+    def _dedup_keep(
+        self,
+        results: List[Tuple[Document, float]],
+        similarity_threshold: float
+    ) -> List[int]:
+        """Indices of results kept by keep-first dedup (pure NumPy path)."""
+        # Cached per-document prefix sets, then all pairwise Jaccard scores at once
+        token_sets = [self.vector_store.document_prefix_tokens(doc) for doc, _ in results]
+        jaccard = self._pairwise_jaccard(token_sets)
+        
+        kept = []
+        for i in range(len(results)):
+            # Check against existing
+            if not (jaccard[i, kept] > similarity_threshold).any():
+                kept.append(i)
+        
+        return kept
+    
+    def _prefix_hashes(self, doc: Document) -> np.ndarray:
+        """Token hashes of the document's 200-char prefix, computed once per document.
+
+        Cached in a side dict keyed by id(doc) (the entry holds the document,
+        so ids can't be reused while cached). Lowercasing and whitespace
+        splitting are ASCII-only at the byte level.
+        """
+        entry = self._prefix_hashes_cache.get(id(doc))
+        if entry is not None and entry[0] is doc:
+            return entry[1]
+        prefix = np.frombuffer(doc.page_content[:200].encode("utf-8"), dtype=np.uint8)
+        hashes = _tokens_hash64(prefix)
+        self._prefix_hashes_cache[id(doc)] = (doc, hashes)
+        return hashes
+    
     @staticmethod
     def _content_overlap(text1: str, text2: str) -> float:
         """Calculate content overlap between two text strings.
@@ -196,15 +380,52 @@ class Retriever:
             >>> overlap = Retriever._content_overlap("Hello world", "Hello there")
             >>> print(f"Overlap: {overlap:.2f}")
         """
-        # Use first N characters for comparison (faster)
-        n = 200
-        text1_prefix = text1[:n].lower()
-        text2_prefix = text2[:n].lower()
+        return Retriever._jaccard(
+            Retriever._prefix_tokens(text1),
+            Retriever._prefix_tokens(text2)
+        )
+    
+    @staticmethod
+    def _prefix_tokens(text: str, n: int = 200) -> frozenset:
+        """Lowercased word set of the first n characters (faster than full text)."""
+        return FaissVectorStore.prefix_tokens(text, n)
+    
+    @staticmethod
+    def _pairwise_jaccard(token_sets: List[frozenset]) -> np.ndarray:
+        """All-pairs Jaccard similarity of word sets via one matrix product.
+
+        Encodes each set as a 0/1 row over the batch vocabulary (K x V);
+        intersections are M @ M.T and unions |A| + |B| - |A & B|.
+
+        Args:
+            token_sets: K word sets.
+
+        Returns:
+            K x K float matrix; 0.0 where either set is empty.
+        """
+        vocab: Dict[bytes, int] = {}
+        rows, cols = [], []
+        for i, tokens in enumerate(token_sets):
+            for word in tokens:
+                rows.append(i)
+                cols.append(vocab.setdefault(word, len(vocab)))
+        
+        indicator = np.zeros((len(token_sets), len(vocab)), dtype=np.float32)
+        indicator[rows, cols] = 1.0
         
-        # Jaccard similarity on words
-        words1 = set(text1_prefix.split())
-        words2 = set(text2_prefix.split())
+        intersection = indicator @ indicator.T
+        sizes = indicator.sum(axis=1)
+        union = sizes[:, None] + sizes[None, :] - intersection
         
+        return np.divide(
+            intersection, union,
+            out=np.zeros_like(intersection),
+            where=(sizes[:, None] > 0) & (sizes[None, :] > 0)
+        )
+    
+    @staticmethod
+    def _jaccard(words1: frozenset, words2: frozenset) -> float:
+        """Jaccard similarity of two word sets (0.0 if either is empty)."""
         if not words1 or not words2:
             return 0.0
         
@@ -1,18 +1,22 @@
 """Vector Store Module using FAISS.
 
 Provides efficient similarity search with metadata storage using FAISS
-IndexFlatIP for cosine similarity.
+inner-product indexes for cosine similarity.
 
 Features:
-    - IndexFlatIP (cosine similarity)
-    - Metadata persistence
+    - IndexFlatIP (exact), IndexScalarQuantizer (int8/fp16 exhaustive scan),
+      IndexHNSWFlat / IndexIVFPQ (approximate)
+    - Metadata persistence (columnar Parquet when pyarrow is installed)
     - Save/load functionality
     - Batch operations
+    - Near-duplicate chunk filtering at ingest (MinHash LSH with datasketch)
 """
 
+import json
+import math
 import pickle
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Tuple, Union
 
 import faiss
 import numpy as np
@@ -21,6 +25,27 @@ from rich.console import Console
 
 import config
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    from datasketch import MinHash, MinHashLSH
+    DATASKETCH_AVAILABLE = True
+except ImportError:
+    DATASKETCH_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTANDARD_AVAILABLE = True
+except ImportError:
+    ZSTANDARD_AVAILABLE = False
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"  # zstd frame header (pickle metadata files)
+
 console = Console()
 
 
@@ -31,11 +56,18 @@ class FaissVectorStore:
     for cosine similarity with L2-normalized vectors. Includes metadata
     persistence for document tracking and citation.
 
-    Index Type:
-        IndexFlatIP - Inner Product similarity (cosine after normalization)
+    Index Types (all Inner Product, i.e. cosine after normalization):
+        IndexFlatIP - Exhaustive scan, exact results
+        IndexScalarQuantizer - Exhaustive scan over int8/fp16 codes
+            (config.FAISS_SQ_TYPE), 2-4x fewer bytes per query; trained on
+            the first add_documents() batch
+        IndexHNSWFlat - Graph-based ANN, ~log N query time
+        IndexIVFPQ - Inverted lists + product quantization, much smaller
+            index; trained on the first add_documents() batch
 
     Attributes:
         dimension: Embedding vector dimension.
+        index_type: FAISS index type name.
         index: FAISS index instance.
         documents: List of LangChain Document objects.
         doc_ids: List of document IDs corresponding to index positions.
@@ -48,53 +80,243 @@ class FaissVectorStore:
         ...     print(f"{doc.metadata['filename']}: {score:.3f}")
     """
 
-    def __init__(self, dimension: int = config.EMBEDDING_DIM):
+    INDEX_TYPES = ("IndexFlatIP", "IndexScalarQuantizer", "IndexHNSWFlat", "IndexIVFPQ")
+    
+    def __init__(self, dimension: int = config.EMBEDDING_DIM, index_type: str = None):
         self.dimension = dimension
-        self.index = faiss.IndexFlatIP(dimension)  # Cosine similarity (after L2 normalization)
+        self.index_type = index_type or config.FAISS_INDEX_TYPE
+        
+        if self.index_type not in self.INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {self.index_type} (expected one of {self.INDEX_TYPES})")
+        
+        self.index = self._create_index()
         self.documents: List[Document] = []
         self.doc_ids: List[int] = []
+        self.read_only = False  # True when the index is memory-mapped from disk
+        
+        # Running stats (kept current by add_documents, O(1) get_stats)
+        self._unique_files: set = set()
+        self._chunks_with_tables = 0
+        self._total_chars = 0
+        
+        # Ingest-time near-duplicate filter
+        # True only while every indexed chunk passed the MinHash filter; the
+        # Retriever then skips its per-query near-duplicate pass
+        self.deduplicated = DATASKETCH_AVAILABLE
+        self._dedup_index = None  # MinHashLSH (or set of prefix word sets), built lazily
+        
+        # Prefix word sets by id(doc) -> (doc, tokens); kept out of doc.metadata so
+        # scratch data never reaches saved or serialized metadata
+        self._prefix_tokens_cache: Dict[int, Tuple[Document, frozenset]] = {}
+        
+        console.print(f"[green]✓[/green] FaissVectorStore initialized (dim={dimension}, {self.index_type})")
+    
+    def _create_index(self, num_vectors: int = 0) -> faiss.Index:
+        """Build an empty index of self.index_type.
+
+        Args:
+            num_vectors: Expected corpus size; sets IVF nlist to sqrt(N).
+        """
+        # Wrapped in IndexIDMap: vectors carry explicit ids (positions in self.documents)
+        if self.index_type == "IndexScalarQuantizer":
+            index = faiss.IndexScalarQuantizer(
+                self.dimension,
+                getattr(faiss.ScalarQuantizer, config.FAISS_SQ_TYPE),
+                faiss.METRIC_INNER_PRODUCT
+            )
+        
+        elif self.index_type == "IndexHNSWFlat":
+            index = faiss.IndexHNSWFlat(self.dimension, config.FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = config.FAISS_HNSW_EF_CONSTRUCTION
+        
+        elif self.index_type == "IndexIVFPQ":
+            nlist = max(1, int(math.sqrt(num_vectors)))
+            quantizer = faiss.IndexFlatIP(self.dimension)
+            index = faiss.IndexIVFPQ(
+                quantizer, self.dimension, nlist, config.FAISS_PQ_M, 8, faiss.METRIC_INNER_PRODUCT
+            )
+        
+        else:
+            index = faiss.IndexFlatIP(self.dimension)  # Cosine similarity (after L2 normalization)
         
-        console.print(f"[green]✓[/green] FaissVectorStore initialized (dim={dimension})")
+        self._set_search_params(index)
+        return faiss.IndexIDMap(index)
+    
+    @staticmethod
+    def _set_search_params(index: faiss.Index):
+        """Apply query-time ANN parameters (efSearch / nprobe)."""
+        if isinstance(index, faiss.IndexIDMap):
+            index = faiss.downcast_index(index.index)
+        
+        if isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = config.FAISS_HNSW_EF_SEARCH
+        elif isinstance(index, faiss.IndexIVF):
+            index.nprobe = config.FAISS_IVF_NPROBE
     
     def add_documents(
         self,
         documents: List[Document],
-        embeddings: List[List[float]],
-        normalize: bool = True
+        embeddings: Union[np.ndarray, List[List[float]]],
+        normalize: bool = True,
+        deduplicate: bool = None
     ):
         """Add documents with embeddings to the index.
 
         Args:
             documents: List of LangChain Documents to add.
-            embeddings: Corresponding embedding vectors.
+            embeddings: Corresponding embedding vectors, ideally a C-contiguous
+                float32 (N, D) array as returned by EmbeddingService, which is
+                used without copying (and normalized in place). Lists are
+                converted once.
             normalize: Whether to L2 normalize for cosine similarity (recommended).
+            deduplicate: Skip chunks whose 200-char prefix is a near-duplicate
+                (Jaccard > config.DEDUP_JACCARD_THRESHOLD) of an indexed chunk
+                (default: config.DEDUP_ON_INGEST).
 
         Raises:
-            ValueError: If number of documents and embeddings don't match.
+            ValueError: If number of documents and embeddings don't match, or
+                the store was loaded read-only (mmap).
         """
         if len(documents) != len(embeddings):
             raise ValueError(f"Mismatch: {len(documents)} docs vs {len(embeddings)} embeddings")
         
-        # Convert to numpy
-        embeddings_np = np.array(embeddings, dtype=np.float32)
+        if self.read_only:
+            raise ValueError("Vector store is memory-mapped read-only; load it with mmap=False to add documents")
         
-        # Normalize for cosine similarity
+        # Convert to numpy (no copy for float32 C-contiguous arrays)
+        embeddings_np = np.ascontiguousarray(embeddings, dtype=np.float32)
+        
+        # Normalize for cosine similarity (in place)
         if normalize:
             faiss.normalize_L2(embeddings_np)
         
-        # Add to index
+        # Skip near-duplicates before they reach the index
+        deduplicate = config.DEDUP_ON_INGEST if deduplicate is None else deduplicate
+        if deduplicate:
+            # The fallback (no datasketch) only catches identical word sets
+            self.deduplicated = self.deduplicated and DATASKETCH_AVAILABLE
+            keep = self._filter_near_duplicates(documents)
+            if len(keep) < len(documents):
+                console.print(
+                    f"[yellow]ℹ[/yellow] Skipped {len(documents) - len(keep)} "
+                    f"near-duplicate chunks"
+                )
+                documents = [documents[i] for i in keep]
+                embeddings_np = embeddings_np[keep]
+        else:
+            self.deduplicated = False
+        
+        if not documents:
+            return
+        
+        # Train on the first bulk add (IVFPQ, 8-bit scalar quantizer)
+        if not self.index.is_trained:
+            # k-means needs >= 256 points for the 8-bit PQ codebooks
+            if self.index_type == "IndexIVFPQ" and len(embeddings_np) < 256:
+                raise ValueError(
+                    f"{self.index_type} needs at least 256 vectors in the first batch "
+                    f"to train (got {len(embeddings_np)}); use IndexFlatIP for small corpora"
+                )
+            self.index = self._create_index(num_vectors=len(embeddings_np))
+            console.print(f"[cyan]Training {self.index_type} on {len(embeddings_np)} vectors...[/cyan]")
+            self.index.train(embeddings_np)
+        
+        # Add to index with explicit ids (= positions in self.documents)
         start_id = len(self.documents)
-        self.index.add(embeddings_np)
+        if isinstance(self.index, faiss.IndexIDMap):
+            self.index.add_with_ids(
+                embeddings_np,
+                np.arange(start_id, start_id + len(documents), dtype=np.int64)
+            )
+        else:
+            self.index.add(embeddings_np)  # Stores saved before IndexIDMap
         
         # Store metadata
         self.documents.extend(documents)
         self.doc_ids.extend(range(start_id, start_id + len(documents)))
+        self._update_stats(documents)
         
         console.print(
             f"[green]✓[/green] Added {len(documents)} documents. "
             f"Total in index: {self.index.ntotal}"
         )
     
+    def _filter_near_duplicates(self, documents: List[Document]) -> List[int]:
+        """Return indices of documents that are not near-duplicates.
+
+        Compares the same 200-char prefix word sets (document_prefix_tokens)
+        as Retriever._deduplicate_results, against both already-indexed chunks
+        and earlier chunks of this batch. With datasketch, candidates come
+        from a MinHash LSH index (O(1) per chunk); without it only identical
+        word sets are caught.
+        """
+        if self._dedup_index is None:
+            self._dedup_index = (
+                MinHashLSH(threshold=config.DEDUP_JACCARD_THRESHOLD, num_perm=config.MINHASH_NUM_PERM)
+                if DATASKETCH_AVAILABLE else set()
+            )
+            # Index already-stored chunks (e.g. after load)
+            self._insert_unique(self.documents, 0)
+        
+        return self._insert_unique(documents, len(self.documents))
+    
+    def _insert_unique(self, documents: List[Document], key_offset: int) -> List[int]:
+        """Insert non-duplicate documents into the dedup index; return their indices."""
+        keep = []
+        for i, doc in enumerate(documents):
+            tokens = self.document_prefix_tokens(doc)
+            
+            # Empty prefixes never count as duplicates (Jaccard 0)
+            if tokens:
+                if DATASKETCH_AVAILABLE:
+                    minhash = MinHash(num_perm=config.MINHASH_NUM_PERM)
+                    minhash.update_batch(list(tokens))
+                    duplicate = bool(self._dedup_index.query(minhash))
+                    if not duplicate:
+                        self._dedup_index.insert(str(key_offset + i), minhash)
+                else:
+                    duplicate = tokens in self._dedup_index
+                    if not duplicate:
+                        self._dedup_index.add(tokens)
+                
+                if duplicate:
+                    # Skipped chunks are not indexed; don't keep them alive in the cache
+                    self._prefix_tokens_cache.pop(id(doc), None)
+                    continue
+            
+            keep.append(i)
+        
+        return keep
+    
+    @staticmethod
+    def prefix_tokens(text: str, n: int = 200) -> frozenset:
+        """Lowercased word set of the first n characters.
+
+        Works on UTF-8 bytes: lower() and split() run in C without building
+        intermediate str objects (case folding and whitespace are ASCII-only).
+        """
+        return frozenset(text[:n].encode("utf-8", "ignore").lower().split())
+    
+    def document_prefix_tokens(self, doc: Document) -> frozenset:
+        """prefix_tokens of a document, computed once per document.
+
+        Cached in a side dict keyed by id(doc); the entry holds the document
+        itself, so an id can't be reused while its entry exists.
+        """
+        entry = self._prefix_tokens_cache.get(id(doc))
+        if entry is not None and entry[0] is doc:
+            return entry[1]
+        tokens = self.prefix_tokens(doc.page_content)
+        self._prefix_tokens_cache[id(doc)] = (doc, tokens)
+        return tokens
+    
+    def _update_stats(self, documents: List[Document]):
+        """Fold newly added documents into the running stats counters."""
+        for doc in documents:
+            self._unique_files.add(doc.metadata.get("filename"))
+            self._chunks_with_tables += bool(doc.metadata.get("has_table", False))
+            self._total_chars += len(doc.page_content)
+    
     def search(
         self,
         query_embedding: List[float],
@@ -113,44 +335,105 @@ class FaissVectorStore:
         Returns:
             List of (Document, similarity_score) tuples, sorted by score descending.
         """
+        return self.search_batch([query_embedding], k=k, threshold=threshold, normalize=normalize)[0]
+    
+    def search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        k: int = None,
+        threshold: float = None,
+        normalize: bool = True
+    ) -> List[List[Tuple[Document, float]]]:
+        """Search top-k documents for several queries with a single FAISS call.
+
+        FAISS parallelizes a (Q, D) query matrix across queries internally, so
+        query variants (multi-query rewriting, HyDE, ...) cost one
+        Python → C round trip instead of Q.
+
+        Args:
+            query_embeddings: Query embedding vectors (Q x D).
+            k: Number of results per query (default: config.TOP_K).
+            threshold: Minimum similarity score (default: config.SIMILARITY_THRESHOLD).
+            normalize: Whether to normalize query vectors.
+
+        Returns:
+            One list of (Document, similarity_score) tuples per query, each
+            sorted by score descending.
+
+        Examples:
+            >>> per_query = store.search_batch([emb_tr, emb_en], k=5)
+            >>> len(per_query)
+            2
+        """
         k = k or config.TOP_K
         threshold = threshold if threshold is not None else config.SIMILARITY_THRESHOLD
         
         if self.index.ntotal == 0:
             console.print("[yellow]⚠[/yellow] Index is empty")
-            return []
+            return [[] for _ in query_embeddings]
         
         # Convert to numpy
-        query_np = np.array([query_embedding], dtype=np.float32)
+        query_np = np.array(query_embeddings, dtype=np.float32).reshape(-1, self.dimension)
         
         # Normalize for cosine similarity
         if normalize:
             faiss.normalize_L2(query_np)
         
-        # Search (get more than k to account for threshold filtering)
-        search_k = min(k * 2, self.index.ntotal)
-        scores, indices = self.index.search(query_np, search_k)
-        
-        # Filter by threshold and collect results
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            # Check for invalid index
-            if not (0 <= idx < len(self.documents)):
-                console.print(f"[red]Warning: Invalid index {idx} from Faiss (total docs: {len(self.documents)})[/red]")
-                continue
-
-            if score >= threshold:
-                results.append((self.documents[idx], float(score)))
-        
-        # Return top-k
-        results = results[:k]
+        # Range search returns only hits above threshold, but is unbounded:
+        # at low thresholds it returns most of the corpus, so use it only when
+        # the threshold is selective (index types without it fall back too)
+        rows = None
+        if threshold >= config.FAISS_RANGE_SEARCH_MIN_THRESHOLD:
+            try:
+                lims, range_scores, range_indices = self.index.range_search(query_np, threshold)
+                rows = [
+                    (range_scores[lims[q]:lims[q + 1]], range_indices[lims[q]:lims[q + 1]])
+                    for q in range(len(query_np))
+                ]
+            except RuntimeError:
+                pass
+        if rows is None:
+            # Bounded top-k search, threshold filtered below
+            scores, indices = self.index.search(query_np, min(k, self.index.ntotal))
+            rows = list(zip(scores, indices))
+        
+        num_docs = len(self.documents)
+        invalid_count = 0
+        all_results = []
+        for row_scores, row_indices in rows:
+            # Top-k by score (range_search hits are unordered): partition, then sort only k
+            if len(row_scores) > k:
+                top = np.argpartition(-row_scores, k)[:k]
+                row_scores = row_scores[top]
+                row_indices = row_indices[top]
+            order = np.argsort(-row_scores, kind="stable")
+            row_scores = row_scores[order]
+            row_indices = row_indices[order]
+            
+            # Bounds and threshold in one vectorized pass (-1 = padding, not an error)
+            in_range = (row_indices >= 0) & (row_indices < num_docs)
+            invalid_count += int(np.count_nonzero(~in_range & (row_indices != -1)))
+            valid = in_range & (row_scores >= threshold)
+            
+            results = [
+                (self.documents[idx], score)
+                for idx, score in zip(row_indices[valid][:k].tolist(), row_scores[valid][:k].tolist())
+            ]
+            
+            if not results:
+                console.print(
+                    f"[yellow]⚠[/yellow] No results above threshold {threshold:.3f}"
+                )
+            
+            all_results.append(results)
         
-        if not results:
+        if invalid_count:
             console.print(
-                f"[yellow]⚠[/yellow] No results above threshold {threshold:.3f}"
+                f"[red]Warning: {invalid_count} invalid indices from Faiss "
+                f"(total docs: {num_docs})[/red]"
             )
         
-        return results
+        return all_results
     
     def delete_by_source(self, source: str) -> int:
         """
@@ -192,27 +475,159 @@ class FaissVectorStore:
         # Save Faiss index
         faiss.write_index(self.index, f"{path}.index")
         
-        # Save metadata
+        # Save metadata (Parquet if available and the metadata is JSON-exact, pickle otherwise)
+        metadata_path = None
+        if PYARROW_AVAILABLE:
+            try:
+                self._write_parquet(f"{path}.parquet")
+                metadata_path = f"{path}.parquet"
+            except TypeError as e:
+                console.print(f"[yellow]⚠[/yellow] {e}; saving metadata as pickle")
+        if metadata_path is None:
+            metadata_path = f"{path}.metadata"
+            self._write_pickle(metadata_path)
+        
+        # Drop the other format's file so load() never pairs stale metadata with this index
+        stale_path = f"{path}.metadata" if metadata_path.endswith(".parquet") else f"{path}.parquet"
+        Path(stale_path).unlink(missing_ok=True)
+        
+        console.print(f"[green]✓[/green] Saved vector store to: {path}")
+        console.print(f"  Index: {path}.index ({self.index.ntotal} vectors)")
+        console.print(f"  Metadata: {metadata_path} ({len(self.documents)} docs)")
+    
+    def _write_pickle(self, metadata_path: str):
+        """Write store metadata as a pickle (zstd-compressed if available)."""
         metadata = {
             "documents": self.documents,
             "doc_ids": self.doc_ids,
             "dimension": self.dimension,
+            "index_type": self.index_type,
+            "stats": self._stats_state(),
+            "deduplicated": self.deduplicated,
         }
         
-        with open(f"{path}.metadata", "wb") as f:
-            pickle.dump(metadata, f)
+        with open(metadata_path, "wb") as f:
+            if ZSTANDARD_AVAILABLE:
+                with zstandard.ZstdCompressor(level=3).stream_writer(f) as writer:
+                    pickle.dump(metadata, writer, protocol=pickle.HIGHEST_PROTOCOL)
+            else:
+                pickle.dump(metadata, f, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    @staticmethod
+    def _metadata_json(metadata: Dict[str, Any]) -> str:
+        """Serialize a metadata dict to JSON, raising TypeError unless it round-trips exactly."""
+        encoded = json.dumps(metadata, ensure_ascii=False)
+        if json.loads(encoded) != metadata:
+            # e.g. tuples come back as lists, non-str keys as str
+            raise TypeError(f"Metadata does not round-trip through JSON: {metadata!r}"[:200])
+        return encoded
+    
+    def _write_parquet(self, metadata_path: str):
+        """Write documents as one Parquet row each (zstd-compressed).
+
+        Columns: doc_id, page_content, filename, has_table, and the full
+        metadata dict as JSON (metadata keys vary by chunking strategy;
+        "_"-prefixed runtime caches are skipped).
+        Store-level fields go into the schema metadata.
+
+        Raises:
+            TypeError: If any metadata would not round-trip through JSON
+                (numpy scalars, datetimes, tuples, sets, ...); nothing is written.
+        """
+        table = pa.Table.from_pydict(
+            {
+                "doc_id": pa.array(self.doc_ids, type=pa.int64()),
+                "page_content": pa.array([doc.page_content for doc in self.documents], type=pa.string()),
+                "filename": pa.array(
+                    [str(doc.metadata.get("filename", "")) for doc in self.documents], type=pa.string()
+                ),
+                "has_table": pa.array(
+                    [bool(doc.metadata.get("has_table", False)) for doc in self.documents], type=pa.bool_()
+                ),
+                "metadata": pa.array(
+                    [
+                        self._metadata_json(
+                            {key: value for key, value in doc.metadata.items() if not key.startswith("_")}
+                        )
+                        for doc in self.documents
+                    ],
+                    type=pa.string()
+                ),
+            },
+            metadata={
+                "dimension": str(self.dimension),
+                "index_type": self.index_type,
+                "stats": self._metadata_json(self._stats_state()),
+                "deduplicated": "1" if self.deduplicated else "0",
+            }
+        )
+        pq.write_table(table, metadata_path, compression="zstd")
+    
+    @staticmethod
+    def _read_parquet(metadata_path: str) -> Dict[str, Any]:
+        """Read a Parquet metadata file back into the pickle metadata layout."""
+        table = pq.read_table(metadata_path, columns=["doc_id", "page_content", "metadata"])
+        schema_metadata = table.schema.metadata or {}
+        
+        documents = [
+            Document(page_content=content, metadata=json.loads(meta))
+            for content, meta in zip(
+                table.column("page_content").to_pylist(),
+                table.column("metadata").to_pylist()
+            )
+        ]
         
-        console.print(f"[green]✓[/green] Saved vector store to: {path}")
-        console.print(f"  Index: {path}.index ({self.index.ntotal} vectors)")
-        console.print(f"  Metadata: {path}.metadata ({len(self.documents)} docs)")
+        return {
+            "documents": documents,
+            "doc_ids": table.column("doc_id").to_pylist(),
+            "dimension": int(schema_metadata[b"dimension"]),
+            "index_type": schema_metadata.get(b"index_type", b"IndexFlatIP").decode(),
+            "stats": json.loads(schema_metadata[b"stats"]) if b"stats" in schema_metadata else None,
+            "deduplicated": schema_metadata.get(b"deduplicated") == b"1",
+        }
+    
+    @staticmethod
+    def _read_pickle(metadata_path: str) -> Dict[str, Any]:
+        """Read a pickle metadata file, stream-decoding it if zstd-compressed."""
+        with open(metadata_path, "rb") as f:
+            if f.read(4) != ZSTD_MAGIC:
+                f.seek(0)
+                return pickle.load(f)
+            
+            if not ZSTANDARD_AVAILABLE:
+                raise ImportError(
+                    f"{metadata_path} is zstd-compressed; install zstandard to load it"
+                )
+            f.seek(0)
+            with zstandard.ZstdDecompressor().stream_reader(f) as reader:
+                return pickle.load(reader)
+    
+    @staticmethod
+    def _mmap_flags(index_type: str) -> int:
+        """Faiss IO flag that memory-maps the bulk of an index of this type.
+
+        IO_FLAG_MMAP only maps IVF inverted lists; Flat, SQ and HNSW keep
+        their vectors in flat codes, which need IO_FLAG_MMAP_IFC (the two
+        cannot be combined for IVF). Returns 0 when the installed faiss
+        cannot map this index type.
+        """
+        if index_type == "IndexIVFPQ":
+            return faiss.IO_FLAG_MMAP
+        return getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
     
     @classmethod
-    def load(cls, path: str = None):
+    def load(cls, path: str = None, mmap: bool = False):
         """
         Load index + metadata from disk
         
         Args:
             path: Load path (default: config.VECTORSTORE_PATH)
+            mmap: Memory-map the index read-only instead of reading it into
+                RAM. Pages fault in lazily and are shared across processes via
+                the OS page cache; the store can be searched but not extended.
+                Off by default so loaded stores accept add_documents. Faiss
+                builds without IO_FLAG_MMAP_IFC fall back to a normal load for
+                Flat/SQ/HNSW indexes.
             
         Returns:
             Loaded FaissVectorStore instance
@@ -222,23 +637,48 @@ class FaissVectorStore:
         # Check files exist
         if not Path(f"{path}.index").exists():
             raise FileNotFoundError(f"Index file not found: {path}.index")
-        if not Path(f"{path}.metadata").exists():
-            raise FileNotFoundError(f"Metadata file not found: {path}.metadata")
+        parquet_path, pickle_path = Path(f"{path}.parquet"), Path(f"{path}.metadata")
+        use_parquet = PYARROW_AVAILABLE and parquet_path.exists() and not (
+            # Both formats present (saved before stale files were removed): newest wins
+            pickle_path.exists() and pickle_path.stat().st_mtime > parquet_path.stat().st_mtime
+        )
+        if not use_parquet and not pickle_path.exists():
+            raise FileNotFoundError(f"Metadata file not found: {path}.parquet / {path}.metadata")
         
         console.print(f"[cyan]Loading vector store from: {path}[/cyan]")
         
-        # Load Faiss index
-        index = faiss.read_index(f"{path}.index")
+        # Load metadata (index type decides the mmap flags)
+        if use_parquet:
+            metadata = cls._read_parquet(str(parquet_path))
+        else:
+            metadata = cls._read_pickle(str(pickle_path))
         
-        # Load metadata
-        with open(f"{path}.metadata", "rb") as f:
-            metadata = pickle.load(f)
+        # Load Faiss index
+        mmap_flags = cls._mmap_flags(metadata.get("index_type", "IndexFlatIP")) if mmap else 0
+        if mmap_flags:
+            index = faiss.read_index(f"{path}.index", mmap_flags | faiss.IO_FLAG_READ_ONLY)
+        else:
+            index = faiss.read_index(f"{path}.index")
         
         # Reconstruct
-        store = cls(dimension=metadata["dimension"])
+        store = cls(
+            dimension=metadata["dimension"],
+            index_type=metadata.get("index_type", "IndexFlatIP")
+        )
+        cls._set_search_params(index)
         store.index = index
+        store.read_only = bool(mmap_flags)
         store.documents = metadata["documents"]
         store.doc_ids = metadata["doc_ids"]
+        store.deduplicated = metadata.get("deduplicated", False)
+        
+        # Restore running stats (recount for stores saved without them)
+        if metadata.get("stats"):
+            store._unique_files = set(metadata["stats"]["unique_files"])
+            store._chunks_with_tables = metadata["stats"]["chunks_with_tables"]
+            store._total_chars = metadata["stats"]["total_chars"]
+        else:
+            store._update_stats(store.documents)
         
         console.print(
             f"[green]✓[/green] Loaded {len(store.documents)} documents "
@@ -247,6 +687,14 @@ class FaissVectorStore:
         
         return store
     
+    def _stats_state(self) -> Dict[str, Any]:
+        """Running stats counters in a serializable form."""
+        return {
+            "unique_files": sorted(self._unique_files, key=str),
+            "chunks_with_tables": self._chunks_with_tables,
+            "total_chars": self._total_chars,
+        }
+    
     def get_stats(self) -> Dict[str, Any]:
         """
         Get vector store statistics
@@ -257,27 +705,14 @@ class FaissVectorStore:
         if not self.documents:
             return {"total_documents": 0, "total_vectors": 0}
         
-        # Count unique files
-        unique_files = set(doc.metadata.get("filename") for doc in self.documents)
-        
-        # Count chunks with tables
-        chunks_with_tables = sum(
-            1 for doc in self.documents 
-            if doc.metadata.get("has_table", False)
-        )
-        
-        # Average chunk length
-        avg_chunk_length = sum(
-            len(doc.page_content) for doc in self.documents
-        ) / len(self.documents)
-        
         return {
             "total_documents": len(self.documents),
             "total_vectors": self.index.ntotal,
-            "unique_files": len(unique_files),
-            "chunks_with_tables": chunks_with_tables,
-            "avg_chunk_length": int(avg_chunk_length),
+            "unique_files": len(self._unique_files),
+            "chunks_with_tables": self._chunks_with_tables,
+            "avg_chunk_length": int(self._total_chars / len(self.documents)),
             "dimension": self.dimension,
+            "index_type": self.index_type,
         }
     
     def print_stats(self):
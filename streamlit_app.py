@@ -15,18 +15,85 @@ Features:
     - Question and patient info history tracking
 """
 
-import io
 import json
-from pathlib import Path
+import re
+from datetime import datetime
+from typing import TYPE_CHECKING
 
-import pandas as pd
 import streamlit as st
 
 import config
 from batch_processor import BatchQueryProcessor
-from batch_query_db import BatchQueryDB
+from batch_query_db import MAX_CONTEXTS, BatchQueryDB
 from src import CitationFormatter, Generator, Retriever
 
+if TYPE_CHECKING:
+    # pandas/openpyxl are imported lazily, only by the batch features
+    import pandas as pd
+
+# Optional: faster JSON export (falls back to json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Mode selector options: (mode, label, description), built once at import
+MODE_OPTIONS_MAIN = (
+    ("patient", "👤 Hasta Bilgilendirme", "8. sınıf seviye, empatik, anlaşılır"),
+    ("patient_personalized", "👥 Hasta Özel", "Klinik bilgilerinize özel, kişiselleştirilmiş"),
+    ("academic", "🎓 Akademisyen", "Teknik, detaylı, akademik üslup")
+)
+MODE_OPTIONS_BATCH = (
+    ("patient", "👤 Hasta Bilgilendirme"),
+    ("patient_personalized", "👥 Hasta Özel"),
+    ("academic", "🎓 Akademisyen")
+)
+
+
+def _fmt_mode(option: tuple) -> str:
+    return f"{option[1]}: {option[2]}"
+
+
+def _fmt_mode_batch(option: tuple) -> str:
+    return option[1]
+
+
+# Batch records tab: table columns and the fields shown in the detail expander
+RECORD_COLUMNS = (
+    'id', 'timestamp', 'question', 'answer', 'mode',
+    'context1_reference', 'context1_similarity',
+    'total_tokens'
+)
+DETAIL_COLUMNS = (
+    'id', 'question', 'answer', 'mode', 'total_tokens',
+    *(f'context{i}_{field}' for i in range(1, MAX_CONTEXTS + 1) for field in ('reference', 'similarity'))
+)
+
+# Mode -> (badge CSS class, display label)
+MODE_META = {
+    mode: (mode.split("_")[0], label)
+    for mode, label, _ in MODE_OPTIONS_MAIN
+}
+
+# Static HTML, built once (rendered with st.html, no Markdown parsing)
+MODE_BADGE_HTML = {
+    mode: f'<span class="mode-badge mode-{css_class}">{label}</span>'
+    for mode, (css_class, label) in MODE_META.items()
+}
+
+# Quality check fields in display order: (key, markdown for a present value)
+QUALITY_CHECK_FIELDS = (
+    ("score", lambda v: f"**Skor:** {v}/10"),
+    ("reasoning", lambda v: f"**Değerlendirme:** {v}"),
+    ("passed", lambda v: f"**Durum:** {'✅ Geçti' if v else '❌ Sorunlar var'}"),
+    ("warnings", lambda v: "**⚠️ Uyarılar:**\n\n" + "\n".join(f"- {w}" for w in v)),
+    ("critical_issues", lambda v: "**🚨 Kritik Sorunlar:**\n\n" + "\n".join(f"- {w}" for w in v)),
+)
+
+# Retrieved contexts / citations shown per page in the main tab
+RESULTS_PAGE_SIZE = 5
+
 # Page config
 st.set_page_config(
     page_title="HAE Q&A System - RAG",
@@ -54,7 +121,7 @@ st.markdown("""
     max-height: 200px;
     overflow-y: auto;
 }
-.full-context {
+[class*="st-key-full_context_"] {
     background-color: #fff;
     padding: 15px;
     border: 1px solid #ddd;
@@ -101,6 +168,355 @@ def load_rag_system():
         return None, None, None, str(e)
 
 
+@st.cache_resource
+def get_batch_db() -> BatchQueryDB:
+    """Process-wide BatchQueryDB (one shared, lock-guarded connection for all sessions)."""
+    return BatchQueryDB()
+
+
+@st.cache_resource
+def get_batch_processor() -> BatchQueryProcessor:
+    """Process-wide BatchQueryProcessor reusing the cached RAG components and DB."""
+    retriever, generator, _, _ = load_rag_system()
+    return BatchQueryProcessor(retriever=retriever, generator=generator, db=get_batch_db())
+
+
+@st.cache_data(show_spinner=False)
+def cached_query_count(_db: BatchQueryDB, version: tuple) -> int:
+    """Row count of the batch DB, recomputed only when version changes."""
+    return _db.get_query_count()
+
+
+@st.cache_data(show_spinner=False)
+def cached_queries(_db: BatchQueryDB, version: tuple, cols: tuple = None, limit: int = None) -> "pd.DataFrame":
+    """Batch DB rows (only cols, newest first), reloaded only when version changes."""
+    return _db.get_queries(cols=list(cols) if cols else None, limit=limit)
+
+
+@st.cache_data(show_spinner=False)
+def cached_export_bytes(_db: BatchQueryDB, version: tuple, fmt: str) -> bytes:
+    """CSV/Excel export of the batch DB serialized in memory, once per version."""
+    import io
+    
+    buffer = io.BytesIO()
+    if fmt == "csv":
+        _db.export_to_csv(buffer)
+    else:
+        _db.export_to_excel_smart(buffer)
+    return buffer.getvalue()
+
+
+def paginate(items: list, key: str, page_size: int = RESULTS_PAGE_SIZE) -> tuple:
+    """Current page of items as (first_number, page_items).
+
+    The page picker is shown only when there is more than one page.
+    """
+    num_pages = max(1, (len(items) + page_size - 1) // page_size)
+    page = 1
+    if num_pages > 1:
+        page = st.number_input("Sayfa", min_value=1, max_value=num_pages, value=1, key=key)
+    start = (page - 1) * page_size
+    return start + 1, items[start:start + page_size]
+
+
+def flatten_results(results: list) -> list:
+    """(Document, score) retrieval results as plain dict rows, built once per query.
+
+    Rows carry the fields the results panel shows; page_content keeps them
+    usable as BatchQueryDB.insert_query() retrieval results.
+    """
+    rows = []
+    for doc, score in results:
+        meta = doc.metadata
+        rows.append({
+            'filename': meta['filename'],
+            'page': meta['page'],
+            'section': meta.get('section', 'Unknown'),
+            'chunk_id': meta.get('chunk_id', '?'),
+            'total_chunks': meta.get('total_chunks', '?'),
+            'has_table': bool(meta.get('has_table')),
+            'score': float(score),
+            'page_content': doc.page_content
+        })
+    return rows
+
+
+def answer_panel_text(result: dict) -> dict:
+    """Markdown payloads of the quality-check and citation panels for one answer.
+
+    Returns:
+        Dict with 'quality' (markdown, may be empty) and 'citations'
+        (list of (expander label, details caption) pairs).
+    """
+    qc = result.get("quality_check") or {}
+    sections = []
+    for key, render in QUALITY_CHECK_FIELDS:
+        value = qc.get(key)
+        if value is None or (isinstance(value, list) and not value):
+            continue
+        sections.append(render(value))
+    
+    citations = []
+    for i, citation in enumerate(result.get("citations") or [], 1):
+        filename = citation['filename']
+        # Use reference if available, otherwise use filename
+        ref_text = citation.get('reference', filename)
+        details = (
+            f"📄 **{filename}** | 📖 Sayfa {citation['page']} | "
+            f"⭐ Benzerlik: {citation['similarity']:.3f}  \n"
+            f"🗂️ Bölüm: {citation['section']}"
+        )
+        if citation.get('has_table'):
+            details += "  \n📊 Bu bölüm tablo içeriyor"
+        citations.append((f"[{i}] {ref_text}", details))
+    
+    return {"quality": "\n\n".join(sections), "citations": citations}
+
+
+def answer_file_slug(question: str) -> str:
+    """Filesystem-safe download file name stem for an answer (max 20 chars)."""
+    slug = re.sub(r'[^\w\-]+', '_', question[:40]).strip('_')[:20]
+    return slug or "answer"
+
+
+def answer_export_bytes(question: str, result: dict, mode: str, mode_name: str) -> tuple:
+    """JSON and Markdown downloads of a single answer, as (json_bytes, md_bytes)."""
+    export_data = {
+        "question": question,
+        "answer": result["answer"],
+        "mode": mode,
+        "citations": list(result.get("citations", [])),
+        "reasoning": result.get("reasoning", ""),
+        "metadata": {
+            "prompt_tokens": result["prompt_tokens"],
+            "completion_tokens": result["completion_tokens"],
+            "total_tokens": result["total_tokens"],
+            "temperature": result.get("temperature", 0.1)
+        }
+    }
+    if ORJSON_AVAILABLE:
+        json_bytes = orjson.dumps(export_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        json_bytes = json.dumps(export_data, ensure_ascii=False, indent=2).encode("utf-8")
+    
+    # Parts joined once (no repeated string concatenation)
+    md_parts = [f"# {question}\n\n**Mod:** {mode_name}\n\n## Cevap\n\n{result['answer']}\n\n"]
+    if result.get("citations"):
+        md_parts.append("## Kaynaklar\n\n")
+        md_parts.extend(
+            f"{i}. {cit.get('reference', cit.get('filename', f'Kaynak {i}'))} (Sayfa {cit['page']})\n"
+            for i, cit in enumerate(result["citations"], 1)
+        )
+    
+    return json_bytes, "".join(md_parts).encode("utf-8")
+
+
+def read_question_sheet(uploaded_file, num_columns: int = 1) -> "pd.DataFrame":
+    """Read the first num_columns columns of an uploaded .xlsx as strings.
+
+    Only those columns are parsed, without dtype inference or NA scanning;
+    rows with an empty first column are dropped. A sheet narrower than
+    num_columns is read with just its first column.
+    """
+    import pandas as pd
+    from pandas.errors import ParserError
+    
+    options = dict(engine='openpyxl', dtype=str, header=0, keep_default_na=False)
+    try:
+        df = pd.read_excel(uploaded_file, usecols=list(range(num_columns)), **options)
+    except ParserError:
+        uploaded_file.seek(0)
+        df = pd.read_excel(uploaded_file, usecols=[0], **options)
+    return df[df.iloc[:, 0].str.strip() != ""]
+
+
+@st.cache_data(show_spinner=False)
+def template_xlsx_bytes() -> bytes:
+    """Example "Soru | Klinik Bilgiler" upload template as .xlsx bytes."""
+    import io
+    
+    import pandas as pd
+    
+    template_df = pd.DataFrame({
+        'Soru': [
+            'HAE nedir?',
+            'Tedavi seçenekleri nelerdir?',
+            'Profilaksi gerekli mi?'
+        ],
+        'Klinik Bilgiler': [
+            'HAE Tip 1, 35 yaş, son atak 2 hafta önce',
+            'İcatibant kullanıyor, gebelik planı var',
+            'Yılda 3-4 atak görülüyor'
+        ]
+    })
+    
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        template_df.to_excel(writer, index=False, sheet_name='Sorular')
+    return output.getvalue()
+
+
+def parse_question_lines(text: str):
+    """One question per non-empty line (no clinical info)."""
+    questions = [q.strip() for q in text.splitlines() if q.strip()]
+    return questions, [""] * len(questions)
+
+
+def parse_question_clinic_lines(text: str):
+    """Parse "Soru | Klinik" lines into (questions, patient_infos).
+
+    Lines without a pipe or with an empty question are skipped; all lines
+    are split in one vectorized pandas pass.
+    """
+    import pandas as pd
+    
+    lines = pd.Series(text.splitlines(), dtype='string').str.strip()
+    lines = lines[lines.str.contains('|', regex=False)]
+    parts = lines.str.split('|', n=1, expand=True)
+    if parts.empty:
+        return [], []
+    
+    pairs = pd.DataFrame({
+        'question': parts[0].str.strip(),
+        'patient_info': parts[1].fillna('').str.strip(),
+    })
+    pairs = pairs[pairs['question'] != '']
+    return pairs['question'].tolist(), pairs['patient_info'].tolist()
+
+
+@st.fragment
+def render_batch_records(batch_db: BatchQueryDB):
+    """Render the saved batch records tab.
+
+    Runs as a fragment: its widgets (e.g. the column toggle) rerun only this
+    tab instead of the whole page.
+    """
+    import pandas as pd
+    
+    st.subheader("Kayıtlı Sorular")
+
+    # Version and count read here, so a fragment rerun sees other sessions' writes
+    version = batch_db.version
+    db_count = cached_query_count(batch_db, version)
+
+    if db_count == 0:
+        st.info("ℹ️ Henüz kayıtlı soru yok. 'Yeni Batch' sekmesinden soru ekleyin.")
+    else:
+        # Display options
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.caption(f"Toplam {db_count} kayıt")
+        with col2:
+            show_full = st.checkbox("Tüm sütunları göster", value=False, key="batch_view_show_full")
+
+        # Column selection: only the displayed columns are read from SQLite
+        if show_full:
+            display_cols = None
+        else:
+            display_cols = tuple(c for c in RECORD_COLUMNS if c in batch_db.columns)
+
+        # Display (cached until the next insert/clear)
+        st.dataframe(
+            cached_queries(batch_db, version, display_cols),
+            use_container_width=True,
+            height=400
+        )
+
+        # Details expander
+        with st.expander("👁️ Detaylı Görünüm (İlk 5 kayıt)"):
+            detail_cols = tuple(c for c in DETAIL_COLUMNS if c in batch_db.columns)
+            for row in cached_queries(batch_db, version, detail_cols, limit=5).itertuples(index=False):
+                st.markdown(f"### Kayıt #{row.id}")
+                st.markdown(f"**Soru:** {row.question}")
+                st.markdown(f"**Cevap:** {row.answer[:200]}...")
+                st.markdown(f"**Mod:** {row.mode} | **Tokens:** {row.total_tokens}")
+
+                # Contexts
+                st.markdown("**Kaynaklar:**")
+                references = [getattr(row, f'context{i}_reference', None) for i in range(1, MAX_CONTEXTS + 1)]
+                for i, reference in enumerate(references, 1):
+                    if pd.notna(reference):
+                        sim = getattr(row, f'context{i}_similarity', 0)
+                        st.markdown(f"- [{i}] {reference} (Benzerlik: {sim:.3f})")
+
+                st.markdown("---")
+
+
+@st.fragment
+def render_batch_export(batch_db: BatchQueryDB):
+    """Render the batch export tab.
+
+    Runs as a fragment: editing file names or clicking export reruns only
+    this tab instead of the whole page.
+    """
+    st.subheader("📥 Export")
+
+    version = batch_db.version
+    db_count = cached_query_count(batch_db, version)
+
+    if db_count == 0:
+        st.info("ℹ️ Database boş. Export edilecek veri yok.")
+    else:
+        st.write(f"**{db_count} kayıt** export edilecek.")
+
+        # Export options
+        export_filename_base = f"batch_queries_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        col1, col2 = st.columns(2)
+
+        # CSV Export
+        with col1:
+            st.markdown("### 📊 CSV Export")
+            
+            csv_filename = st.text_input(
+                "CSV Dosya adı:",
+                value=f"{export_filename_base}.csv",
+                key="csv_export_filename"
+            )
+
+            if st.button("📥 CSV İndir", type="primary", use_container_width=True, key="csv_export_btn"):
+                try:
+                    st.download_button(
+                        label="⬇️ CSV Dosyasını İndir",
+                        data=cached_export_bytes(batch_db, version, "csv"),
+                        file_name=csv_filename,
+                        mime="text/csv",
+                        use_container_width=True,
+                        key="csv_export_download_btn"
+                    )
+
+                    st.success(f"✓ CSV Export tamamlandı: {csv_filename}")
+
+                except Exception as e:
+                    st.error(f"❌ CSV export hatası: {str(e)}")
+
+        # Excel Export
+        with col2:
+            st.markdown("### 📗 Excel Export")
+            
+            excel_filename = st.text_input(
+                "Excel Dosya adı:",
+                value=f"{export_filename_base}.xlsx",
+                key="excel_export_filename"
+            )
+
+            if st.button("📥 Excel İndir", type="primary", use_container_width=True, key="excel_export_btn"):
+                try:
+                    st.download_button(
+                        label="⬇️ Excel Dosyasını İndir",
+                        data=cached_export_bytes(batch_db, version, "xlsx"),
+                        file_name=excel_filename,
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        use_container_width=True,
+                        key="excel_export_download_btn"
+                    )
+
+                    st.success(f"✓ Excel Export tamamlandı: {excel_filename}")
+
+                except Exception as e:
+                    st.error(f"❌ Excel export hatası: {str(e)}")
+
+
 def main():
     """Main application entry point.
 
@@ -144,10 +560,8 @@ def main():
         st.markdown("**Birden fazla soruyu toplu olarak işleyin ve sonuçları database'e kaydedin**")
 
         # Initialize
-        if 'batch_processor' not in st.session_state:
-            st.session_state.batch_processor = None
-        if 'batch_db' not in st.session_state:
-            st.session_state.batch_db = BatchQueryDB()
+        batch_db = get_batch_db()
+        db_count = cached_query_count(batch_db, batch_db.version)
 
         # Sidebar - Batch Settings
         with st.sidebar:
@@ -156,12 +570,8 @@ def main():
             # Mode selection
             batch_mode = st.selectbox(
                 "Mod",
-                options=[
-                    ("patient", "👤 Hasta Bilgilendirme"),
-                    ("patient_personalized", "👥 Hasta Özel"),
-                    ("academic", "🎓 Akademisyen")
-                ],
-                format_func=lambda x: x[1],
+                options=MODE_OPTIONS_BATCH,
+                format_func=_fmt_mode_batch,
                 key="batch_mode_select"
             )[0]
 
@@ -186,14 +596,13 @@ def main():
 
             # Database stats
             st.subheader("📊 Database İstatistikleri")
-            db_count = st.session_state.batch_db.get_query_count()
             st.metric("Kayıtlı Sorular", db_count)
 
             # Clear database
             if st.button("🗑️ Database'i Temizle", type="secondary", key="batch_db_clear_btn"):
-                if st.session_state.batch_db.get_query_count() > 0:
+                if db_count > 0:
                     if st.checkbox("Eminim, tüm kayıtları sil", key="batch_db_clear_confirm"):
-                        st.session_state.batch_db.clear_all()
+                        batch_db.clear_all()
                         st.success("✓ Database temizlendi!")
                         st.rerun()
 
@@ -218,6 +627,7 @@ def main():
                 
                 questions = []
                 patient_infos = []
+                raw_text, raw_parser = "", None
                 
                 if input_method == "Manuel Giriş (Soru | Klinik)":
                     st.markdown("""
@@ -233,51 +643,22 @@ def main():
                         key="batch_questions_personalized_text"
                     )
                     
-                    if questions_text:
-                        for line in questions_text.split('\n'):
-                            line = line.strip()
-                            if not line or '|' not in line:
-                                continue
-                            
-                            parts = line.split('|', 1)
-                            question = parts[0].strip()
-                            patient_info = parts[1].strip() if len(parts) > 1 else ""
-                            
-                            if question:
-                                questions.append(question)
-                                patient_infos.append(patient_info)
+                    # Parsed only when the batch is started, not on every rerun
+                    raw_text, raw_parser = questions_text.strip(), parse_question_clinic_lines
                 
                 else:  # Dosyadan Yükle
                     st.markdown("**Excel Şablon Formatı:**")
                     st.markdown("- **Sütun 1:** Soru metni")
                     st.markdown("- **Sütun 2:** Klinik bilgiler (opsiyonel)")
                     
-                    # Template download button
-                    if st.button("📋 Örnek Excel Şablonu İndir", key="download_template_btn"):
-                        template_df = pd.DataFrame({
-                            'Soru': [
-                                'HAE nedir?',
-                                'Tedavi seçenekleri nelerdir?',
-                                'Profilaksi gerekli mi?'
-                            ],
-                            'Klinik Bilgiler': [
-                                'HAE Tip 1, 35 yaş, son atak 2 hafta önce',
-                                'İcatibant kullanıyor, gebelik planı var',
-                                'Yılda 3-4 atak görülüyor'
-                            ]
-                        })
-                        
-                        output = io.BytesIO()
-                        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                            template_df.to_excel(writer, index=False, sheet_name='Sorular')
-                        
-                        st.download_button(
-                            label="⬇️ Şablonu İndir",
-                            data=output.getvalue(),
-                            file_name="batch_sorular_sablon.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            key="template_download_btn"
-                        )
+                    # Template download (bytes built once per process)
+                    st.download_button(
+                        label="📋 Örnek Excel Şablonu İndir",
+                        data=template_xlsx_bytes(),
+                        file_name="batch_sorular_sablon.xlsx",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        key="template_download_btn"
+                    )
                     
                     uploaded_file = st.file_uploader(
                         "Excel dosyası yükle (.xlsx) - 2 sütun: Soru | Klinik",
@@ -287,19 +668,15 @@ def main():
                     
                     if uploaded_file:
                         try:
-                            df = pd.read_excel(uploaded_file)
+                            df = read_question_sheet(uploaded_file, num_columns=2)
+                            questions = df.iloc[:, 0].tolist()
                             
-                            if len(df.columns) < 1:
-                                st.error("❌ Dosyada en az 1 sütun olmalı (Soru)")
+                            if df.shape[1] >= 2:
+                                patient_infos = df.iloc[:, 1].tolist()
                             else:
-                                questions = df.iloc[:, 0].dropna().astype(str).tolist()
-                                
-                                if len(df.columns) >= 2:
-                                    patient_infos = df.iloc[:, 1].fillna("").astype(str).tolist()
-                                else:
-                                    patient_infos = [""] * len(questions)
-                                
-                                st.success(f"✓ {len(questions)} soru-klinik çifti yüklendi")
+                                patient_infos = [""] * len(questions)
+                            
+                            st.success(f"✓ {len(questions)} soru-klinik çifti yüklendi")
                         except Exception as e:
                             st.error(f"❌ Dosya okuma hatası: {e}")
                 
@@ -307,14 +684,11 @@ def main():
                 if questions:
                     st.info(f"📝 **{len(questions)} soru-klinik çifti** işlenmeye hazır")
                     with st.expander("👁️ Soru-Klinik çiftlerini önizle"):
-                        for i, (q, p) in enumerate(zip(questions, patient_infos), 1):
-                            st.markdown(f"**{i}. Soru:** {q}")
-                            if p:
-                                st.markdown(f"   *Klinik:* {p}")
-                            else:
-                                st.markdown(f"   *Klinik:* (boş)")
-                            if i < len(questions):
-                                st.markdown("---")
+                        # One markdown element instead of ~3 per pair
+                        st.markdown("\n\n---\n\n".join(
+                            f"**{i}. Soru:** {q}\n\n*Klinik:* {p or '(boş)'}"
+                            for i, (q, p) in enumerate(zip(questions, patient_infos), 1)
+                        ))
             
             else:
                 # NORMAL MODES: Standard input
@@ -327,6 +701,7 @@ def main():
 
                 questions = []
                 patient_infos = []
+                raw_text, raw_parser = "", None
 
                 if input_method == "Manuel Giriş":
                     questions_text = st.text_area(
@@ -335,9 +710,8 @@ def main():
                         placeholder="HAE nedir?\nHAE tedavi yöntemleri nelerdir?\nC1 inhibitör eksikliği nedir?",
                         key="batch_questions_text"
                     )
-                    if questions_text:
-                        questions = [q.strip() for q in questions_text.split('\n') if q.strip()]
-                        patient_infos = [""] * len(questions)
+                    # Parsed only when the batch is started, not on every rerun
+                    raw_text, raw_parser = questions_text.strip(), parse_question_lines
 
                 else:  # Dosyadan Yükle
                     uploaded_file = st.file_uploader(
@@ -349,215 +723,106 @@ def main():
                     if uploaded_file:
                         try:
                             if uploaded_file.name.endswith('.txt'):
-                                questions_text = uploaded_file.read().decode('utf-8')
-                                questions = [q.strip() for q in questions_text.split('\n') if q.strip()]
+                                lines = uploaded_file.getvalue().decode('utf-8').splitlines()
+                                questions = [q.strip() for q in lines if q.strip()]
                                 patient_infos = [""] * len(questions)
                             elif uploaded_file.name.endswith('.xlsx'):
-                                df = pd.read_excel(uploaded_file)
-                                questions = df.iloc[:, 0].dropna().astype(str).tolist()
+                                questions = read_question_sheet(uploaded_file).iloc[:, 0].tolist()
                                 patient_infos = [""] * len(questions)
 
                             st.success(f"✓ {len(questions)} soru yüklendi")
                         except Exception as e:
                             st.error(f"❌ Dosya okuma hatası: {e}")
 
-            # Preview questions
+            # Preview questions (uploads only: typed text is parsed on submit)
             if questions:
                 st.info(f"📝 **{len(questions)} soru** işlenmeye hazır")
                 with st.expander("👁️ Soruları önizle"):
-                    for i, q in enumerate(questions[:10], 1):
-                        st.caption(f"{i}. {q}")
+                    # One code block instead of one caption per question
+                    preview = "\n".join(f"{i}. {q}" for i, q in enumerate(questions[:10], 1))
                     if len(questions) > 10:
-                        st.caption(f"... ve {len(questions) - 10} soru daha")
+                        preview += f"\n... ve {len(questions) - 10} soru daha"
+                    st.code(preview, language=None)
 
+            if questions or raw_text:
                 # Process button
                 if st.button("🚀 Batch İşleme Başlat", type="primary", use_container_width=True, key="batch_process_btn"):
-                    # Initialize processor
-                    if st.session_state.batch_processor is None:
-                        st.session_state.batch_processor = BatchQueryProcessor()
-
-                    # Process
-                    with st.spinner(f"⏳ {len(questions)} soru işleniyor..."):
-                        progress_bar = st.progress(0)
-                        status_text = st.empty()
-
-                        results = []
-                        for i, question in enumerate(questions, 1):
-                            status_text.text(f"İşleniyor: {i}/{len(questions)} - {question[:50]}...")
-                            progress_bar.progress(i / len(questions))
-
-                            try:
-                                current_patient_info = patient_infos[i-1] if patient_infos and i-1 < len(patient_infos) else batch_patient_info
-                                
-                                result = st.session_state.batch_processor.process_single_question(
-                                    question=question,
-                                    mode=batch_mode,
-                                    patient_info=current_patient_info,
-                                    threshold=batch_threshold,
-                                    top_k=batch_top_k
-                                )
-                                results.append(result)
-
-                                # Insert to database
-                                st.session_state.batch_db.insert_query(result)
-
-                            except Exception as e:
-                                st.warning(f"⚠️ Hata (soru {i}): {str(e)}")
-
-                        progress_bar.empty()
-                        status_text.empty()
-
-                    st.success(f"✓ {len(results)} soru başarıyla işlendi ve database'e kaydedildi!")
-
-                    # Show summary
-                    if results:
-                        st.subheader("📊 Özet İstatistikler")
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            results_with_citations = [r for r in results if r.get('citations')]
-                            if results_with_citations:
-                                avg_sim = sum(r['citations'][0]['similarity'] for r in results_with_citations) / len(results_with_citations)
-                                st.metric("Ort. Benzerlik", f"{avg_sim:.3f}")
-                            else:
-                                st.metric("Ort. Benzerlik", "N/A")
-                        with col2:
-                            avg_tokens = sum(r['total_tokens'] for r in results) / len(results)
-                            st.metric("Ort. Token", f"{avg_tokens:.0f}")
-                        with col3:
-                            total_time = sum(r.get('query_time', 0) for r in results)
-                            st.metric("Toplam Süre", f"{total_time:.1f}s")
+                    if raw_parser is not None:
+                        questions, patient_infos = raw_parser(raw_text)
+                    
+                    if not questions:
+                        st.warning("⚠️ İşlenecek geçerli soru bulunamadı")
+                    else:
+                        # Process
+                        with st.spinner(f"⏳ {len(questions)} soru işleniyor..."):
+                            progress_bar = st.progress(0)
+                            status_text = st.empty()
 
-        # TAB 2: View Records
-        with tab2:
-            st.subheader("Kayıtlı Sorular")
+                            # At most ~100 UI updates per batch (each one is a websocket round trip)
+                            progress_step = max(1, len(questions) // 100)
+                            
+                            def on_progress(done, total, message):
+                                if done % progress_step == 0 or done == total:
+                                    status_text.text(f"İşleniyor: {done}/{total} - {message}")
+                                    progress_bar.progress(done / total)
+                            
+                            # One batched retrieval, then concurrent generation (LLM I/O bound)
+                            results = get_batch_processor().process_batch(
+                                questions,
+                                modes=[batch_mode] * len(questions),
+                                patient_infos=[
+                                    patient_infos[i] if patient_infos and i < len(patient_infos) else batch_patient_info
+                                    for i in range(len(questions))
+                                ],
+                                threshold=batch_threshold,
+                                top_k=batch_top_k,
+                                progress_callback=on_progress
+                            )
+                            
+                            for i, result in enumerate(results, 1):
+                                if "error" in result:
+                                    st.warning(f"⚠️ Hata (soru {i}): {result['error']}")
+                            
+                            # One prepared statement + one commit for the whole batch
+                            batch_db.insert_queries(results)
 
-            if st.session_state.batch_db.get_query_count() == 0:
-                st.info("ℹ️ Henüz kayıtlı soru yok. 'Yeni Batch' sekmesinden soru ekleyin.")
-            else:
-                # Load data
-                df = st.session_state.batch_db.get_all_queries()
-
-                # Display options
-                col1, col2 = st.columns([3, 1])
-                with col1:
-                    st.caption(f"Toplam {len(df)} kayıt")
-                with col2:
-                    show_full = st.checkbox("Tüm sütunları göster", value=False, key="batch_view_show_full")
-
-                # Column selection
-                if show_full:
-                    display_cols = df.columns.tolist()
-                else:
-                    display_cols = [
-                        'id', 'timestamp', 'question', 'answer', 'mode',
-                        'context1_reference', 'context1_similarity',
-                        'total_tokens'
-                    ]
-                    display_cols = [c for c in display_cols if c in df.columns]
-
-                # Display
-                st.dataframe(
-                    df[display_cols],
-                    use_container_width=True,
-                    height=400
-                )
+                            progress_bar.empty()
+                            status_text.empty()
 
-                # Details expander
-                with st.expander("👁️ Detaylı Görünüm (İlk 5 kayıt)"):
-                    for idx, row in df.head(5).iterrows():
-                        st.markdown(f"### Kayıt #{row['id']}")
-                        st.markdown(f"**Soru:** {row['question']}")
-                        st.markdown(f"**Cevap:** {row['answer'][:200]}...")
-                        st.markdown(f"**Mod:** {row['mode']} | **Tokens:** {row['total_tokens']}")
+                        st.success(f"✓ {len(results)} soru başarıyla işlendi ve database'e kaydedildi!")
 
-                        # Contexts
-                        st.markdown("**Kaynaklar:**")
-                        for i in range(1, 6):
-                            colname_ref = f'context{i}_reference'
-                            if colname_ref in row and pd.notna(row[colname_ref]):
-                                sim = row.get(f'context{i}_similarity', 0)
-                                st.markdown(f"- [{i}] {row[colname_ref]} (Benzerlik: {sim:.3f})")
+                        # Show summary
+                        if results:
+                            st.subheader("📊 Özet İstatistikler")
+                            
+                            # All three aggregates in one pass over the results
+                            sim_sum, sim_count, token_sum, total_time = 0.0, 0, 0, 0.0
+                            for r in results:
+                                citations = r.get('citations')
+                                if citations:
+                                    sim_sum += citations[0]['similarity']
+                                    sim_count += 1
+                                token_sum += r['total_tokens']
+                                total_time += r.get('query_time', 0)
+                            
+                            col1, col2, col3 = st.columns(3)
+                            with col1:
+                                if sim_count:
+                                    st.metric("Ort. Benzerlik", f"{sim_sum / sim_count:.3f}")
+                                else:
+                                    st.metric("Ort. Benzerlik", "N/A")
+                            with col2:
+                                st.metric("Ort. Token", f"{token_sum / len(results):.0f}")
+                            with col3:
+                                st.metric("Toplam Süre", f"{total_time:.1f}s")
 
-                        st.markdown("---")
+        # TAB 2: View Records
+        with tab2:
+            render_batch_records(batch_db)
 
         # TAB 3: Export
         with tab3:
-            st.subheader("📥 Export")
-
-            db_count_export = st.session_state.batch_db.get_query_count()
-            if db_count_export == 0:
-                st.info("ℹ️ Database boş. Export edilecek veri yok.")
-            else:
-                st.write(f"**{db_count_export} kayıt** export edilecek.")
-
-                # Export options
-                export_filename_base = f"batch_queries_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}"
-
-                col1, col2 = st.columns(2)
-
-                # CSV Export
-                with col1:
-                    st.markdown("### 📊 CSV Export")
-                    
-                    csv_filename = st.text_input(
-                        "CSV Dosya adı:",
-                        value=f"{export_filename_base}.csv",
-                        key="csv_export_filename"
-                    )
-
-                    if st.button("📥 CSV İndir", type="primary", use_container_width=True, key="csv_export_btn"):
-                        try:
-                            output_path = f"data/exports/{csv_filename}"
-                            Path("data/exports").mkdir(parents=True, exist_ok=True)
-
-                            st.session_state.batch_db.export_to_csv(output_path)
-
-                            with open(output_path, 'rb') as f:
-                                st.download_button(
-                                    label="⬇️ CSV Dosyasını İndir",
-                                    data=f,
-                                    file_name=csv_filename,
-                                    mime="text/csv",
-                                    use_container_width=True,
-                                    key="csv_export_download_btn"
-                                )
-
-                            st.success(f"✓ CSV Export tamamlandı: {csv_filename}")
-
-                        except Exception as e:
-                            st.error(f"❌ CSV export hatası: {str(e)}")
-
-                # Excel Export
-                with col2:
-                    st.markdown("### 📗 Excel Export")
-                    
-                    excel_filename = st.text_input(
-                        "Excel Dosya adı:",
-                        value=f"{export_filename_base}.xlsx",
-                        key="excel_export_filename"
-                    )
-
-                    if st.button("📥 Excel İndir", type="primary", use_container_width=True, key="excel_export_btn"):
-                        try:
-                            output_path = f"data/exports/{excel_filename}"
-                            Path("data/exports").mkdir(parents=True, exist_ok=True)
-
-                            st.session_state.batch_db.export_to_excel_smart(output_path)
-
-                            with open(output_path, 'rb') as f:
-                                st.download_button(
-                                    label="⬇️ Excel Dosyasını İndir",
-                                    data=f,
-                                    file_name=excel_filename,
-                                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                    use_container_width=True,
-                                    key="excel_export_download_btn"
-                                )
-
-                            st.success(f"✓ Excel Export tamamlandı: {excel_filename}")
-
-                        except Exception as e:
-                            st.error(f"❌ Excel export hatası: {str(e)}")
+            render_batch_export(batch_db)
 
 
     # -----------------------
@@ -583,12 +848,8 @@ def main():
             st.subheader("🎭 Kullanım Modu")
             mode = st.radio(
                 "Mod seçin:",
-                options=[
-                    ("patient", "👤 Hasta Bilgilendirme", "8. sınıf seviye, empatik, anlaşılır"),
-                    ("patient_personalized", "👥 Hasta Özel", "Klinik bilgilerinize özel, kişiselleştirilmiş"),
-                    ("academic", "🎓 Akademisyen", "Teknik, detaylı, akademik üslup")
-                ],
-                format_func=lambda x: f"{x[1]}: {x[2]}",
+                options=MODE_OPTIONS_MAIN,
+                format_func=_fmt_mode,
                 key="mode_select"
             )[0]
 
@@ -630,301 +891,266 @@ def main():
             show_metadata = st.checkbox("Metadata göster", value=False, key="show_metadata")
             show_full_context = st.checkbox("Tüm context'leri göster", value=False, key="show_full_context")
             show_quality_check = st.checkbox("Kalite kontrolü yap", value=False, key="show_quality_check")
+            st.checkbox("🐛 Debug modu", value=False, key="debug_mode")
+
+        # Query panel as a fragment: asking, clearing and exporting rerun only
+        # this panel, not the sidebar and the batch tab
+        @st.fragment
+        def render_query_panel():
+            # -----------------------
+            # Query Interface
+            # -----------------------
+            st.subheader("💬 Soru Sorun")
+
+            question = st.text_input(
+                "Sorunuz:",
+                value="",
+                placeholder="Örn: HAE nedir? Nasıl tedavi edilir?",
+                key="question_input"
+            )
 
-        # -----------------------
-        # Query Interface
-        # -----------------------
-        st.subheader("💬 Soru Sorun")
-
-        question = st.text_input(
-            "Sorunuz:",
-            value="",
-            placeholder="Örn: HAE nedir? Nasıl tedavi edilir?",
-            key="question_input"
-        )
-
-        col1, col2, col3 = st.columns([2, 1, 1])
-        with col1:
-            query_button = st.button("🔍 Sorgula", type="primary", use_container_width=True)
-        with col2:
-            clear_button = st.button("🗑️ Temizle", use_container_width=True)
-        with col3:
-            if st.button("🔄 Yenile", use_container_width=True):
+            col1, col2, col3 = st.columns([2, 1, 1])
+            with col1:
+                query_button = st.button("🔍 Sorgula", type="primary", use_container_width=True)
+            with col2:
+                clear_button = st.button("🗑️ Temizle", use_container_width=True)
+            with col3:
+                if st.button("🔄 Yenile", use_container_width=True):
+                    st.rerun()
+
+            if clear_button:
+                st.session_state.query_results = None
+                st.session_state.last_question = None
                 st.rerun()
 
-        if clear_button:
-            st.session_state.query_results = None
-            st.session_state.last_question = None
-            st.rerun()
-
-        # Process query
-        if query_button and question:
-            st.session_state.last_question = question
-
-            try:
-                with st.spinner("🔍 Benzer bağlamlar aranıyor..."):
-                    # 1. Retrieve
-                    results = retriever.retrieve(
-                        query=question,
-                        k=top_k,
-                        threshold=threshold
-                    )
+            # Process query
+            if query_button and question:
+                st.session_state.last_question = question
+
+                try:
+                    with st.spinner("🔍 Benzer bağlamlar aranıyor..."):
+                        # 1. Retrieve
+                        results = retriever.retrieve(
+                            query=question,
+                            k=top_k,
+                            threshold=threshold
+                        )
 
-                    formatted_contexts = ""
-                    if not results:
-                        st.warning(f"⚠️ Eşik ({threshold:.2f}) üzerinde benzerlik bulunamadı.")
-                        st.info("""Bu soru muhtemelen Herediter Anjioödem (HAE) ile ilgili değil veya kaynaklarda bu spesifik bilgi yok.""")
-                    else:
-                        st.success(f"✓ {len(results)} ilgili bağlam bulundu")
-                        formatted_contexts = retriever.format_contexts_for_llm(results)
-
-                with st.spinner("🤖 DeepSeek R1 cevap üretiyor..."):
-                    # 2. Generate with mode
-                    patient_info_to_use = st.session_state.patient_info if selected_mode == "patient_personalized" else None
-
-                    result = generator.generate_with_citations(
-                        question=question,
-                        retrieval_results=results,
-                        formatted_contexts=formatted_contexts,
-                        mode=selected_mode,
-                        patient_info=patient_info_to_use,
-                        validate_quality=show_quality_check
-                    )
+                        formatted_contexts = ""
+                        if not results:
+                            st.warning(f"⚠️ Eşik ({threshold:.2f}) üzerinde benzerlik bulunamadı.")
+                            st.info("""Bu soru muhtemelen Herediter Anjioödem (HAE) ile ilgili değil veya kaynaklarda bu spesifik bilgi yok.""")
+                        else:
+                            st.success(f"✓ {len(results)} ilgili bağlam bulundu")
+                            formatted_contexts = retriever.format_contexts_for_llm(results)
+
+                    with st.spinner("🤖 DeepSeek R1 cevap üretiyor..."):
+                        # 2. Generate with mode
+                        patient_info_to_use = st.session_state.patient_info if selected_mode == "patient_personalized" else None
+
+                        result = generator.generate_with_citations(
+                            question=question,
+                            retrieval_results=results,
+                            formatted_contexts=formatted_contexts,
+                            mode=selected_mode,
+                            patient_info=patient_info_to_use,
+                            validate_quality=show_quality_check
+                        )
 
-                    # Save to session state
-                    st.session_state.query_results = {
-                        'question': question,
-                        'results': results,
-                        'result': result,
-                        'mode': selected_mode,
-                        'patient_info': patient_info_to_use
-                    }
-
-            except Exception as e:
-                st.error(f"❌ Hata: {e}")
-                with st.expander("🐛 Debug Info"):
-                    import traceback
-                    st.code(traceback.format_exc())
-                st.stop()
+                        # Save to session state (flat rows, not Documents)
+                        st.session_state.query_results = {
+                            'question': question,
+                            'results_flat': flatten_results(results),
+                            'slug': answer_file_slug(question),
+                            # Built once per answer; reruns only re-emit it
+                            'panels': answer_panel_text(result),
+                            'exports': answer_export_bytes(
+                                question, result, selected_mode, MODE_META[selected_mode][1]
+                            ),
+                            'result': result,
+                            'mode': selected_mode,
+                            'patient_info': patient_info_to_use
+                        }
 
-        # -----------------------
-        # Display Results
-        # -----------------------
-        if st.session_state.query_results:
-            results = st.session_state.query_results['results']
-            result = st.session_state.query_results['result']
-            question = st.session_state.query_results['question']
-            display_mode = st.session_state.query_results['mode']
-
-            # Show contexts BEFORE answer (if enabled AND results exist)
-            if show_full_context and results:
-                with st.expander("📚 Retrieved Contexts (Tam Bağlamlar)", expanded=False):
-                    for i, (doc, score) in enumerate(results, 1):
-                        st.markdown(f"### Context {i}")
-
-                        # Metadata
-                        c1, c2, c3 = st.columns(3)
-                        with c1:
-                            st.caption(f"📄 **{doc.metadata['filename']}**")
-                        with c2:
-                            st.caption(f"📖 Sayfa {doc.metadata['page']}")
-                        with c3:
-                            st.caption(f"⭐ Skor: {score:.3f}")
-
-                        if show_metadata:
-                            st.caption(f"🗂️ Bölüm: {doc.metadata.get('section', 'Unknown')}")
-                            st.caption(f"🔢 Chunk: {doc.metadata.get('chunk_id', '?')}/{doc.metadata.get('total_chunks', '?')}")
-                            if doc.metadata.get('has_table'):
-                                st.caption("📊 İçerik: Tablo içerir")
-
-                        # Full text
-                        st.markdown('<div class="full-context">', unsafe_allow_html=True)
-                        st.markdown(doc.page_content)
-                        st.markdown('</div>', unsafe_allow_html=True)
-
-                        st.markdown("---")
-
-            # Main answer
-            st.markdown("---")
-            st.subheader("💡 Cevap")
+                except Exception as e:
+                    st.error(f"❌ Hata: {e}")
+                    # Traceback is formatted only when debugging
+                    if st.session_state.get('debug_mode', False):
+                        with st.expander("🐛 Debug Info"):
+                            import traceback
+                            st.code(traceback.format_exc())
+                    st.stop()
+
+            # -----------------------
+            # Display Results
+            # -----------------------
+            # Nested fragment: pagination, toggles, save, copy and downloads
+            # rerun only the results, not the query input above
+            @st.fragment
+            def render_results():
+                if not st.session_state.query_results:
+                    return
+
+                results_flat = st.session_state.query_results['results_flat']
+                result = st.session_state.query_results['result']
+                question = st.session_state.query_results['question']
+                display_mode = st.session_state.query_results['mode']
+
+                # Show contexts BEFORE answer (if enabled AND results exist)
+                if show_full_context and results_flat:
+                    # Built only when toggled on: a collapsed expander still renders its body
+                    if st.toggle("📚 Retrieved Contexts (Tam Bağlamlar)", value=False, key="show_ctx_rendered"):
+                        first, page_rows = paginate(results_flat, key="ctx_page")
+                        for i, row in enumerate(page_rows, first):
+                            st.markdown(f"### Context {i}")
+
+                            # Metadata
+                            c1, c2, c3 = st.columns(3)
+                            with c1:
+                                st.caption(f"📄 **{row['filename']}**")
+                            with c2:
+                                st.caption(f"📖 Sayfa {row['page']}")
+                            with c3:
+                                st.caption(f"⭐ Skor: {row['score']:.3f}")
+
+                            if show_metadata:
+                                st.caption(f"🗂️ Bölüm: {row['section']}")
+                                st.caption(f"🔢 Chunk: {row['chunk_id']}/{row['total_chunks']}")
+                                if row['has_table']:
+                                    st.caption("📊 İçerik: Tablo içerir")
+
+                            # Full text (keyed container, styled via its st-key-full_context_* class)
+                            with st.container(key=f"full_context_{i}"):
+                                st.markdown(row['page_content'])
+
+                            st.markdown("---")
+
+                # Main answer
+                st.markdown("---")
+                st.subheader("💡 Cevap")
 
-            # Mode badge
-            mode_names = {
-                "patient": "👤 Hasta Bilgilendirme",
-                "patient_personalized": "👥 Hasta Özel",
-                "academic": "🎓 Akademisyen"
-            }
-            st.markdown(f'<span class="mode-badge mode-{display_mode.split("_")[0]}">{mode_names[display_mode]}</span>', unsafe_allow_html=True)
+                # Mode badge
+                st.html(MODE_BADGE_HTML[display_mode])
 
-            # Answer text
-            st.markdown(result["answer"])
+                # Answer text
+                st.markdown(result["answer"])
 
-            # Quality check (if enabled)
-            if show_quality_check and "quality_check" in result:
-                qc = result["quality_check"]
-                with st.expander("✅ Kalite Kontrolü", expanded=False):
-                    if "score" in qc:
-                        st.markdown(f"**Skor:** {qc['score']}/10")
-                    
-                    if "reasoning" in qc:
-                        st.markdown(f"**Değerlendirme:** {qc['reasoning']}")
-                    
-                    if "passed" in qc:
-                        status = "✅ Geçti" if qc["passed"] else "❌ Sorunlar var"
-                        st.markdown(f"**Durum:** {status}")
-                    
-                    if "warnings" in qc and qc["warnings"]:
-                        st.markdown("**⚠️ Uyarılar:**")
-                        for warning in qc["warnings"]:
-                            st.markdown(f"- {warning}")
-                    
-                    if "critical_issues" in qc and qc["critical_issues"]:
-                        st.markdown("**🚨 Kritik Sorunlar:**")
-                        for issue in qc["critical_issues"]:
-                            st.markdown(f"- {issue}")
-                    
-                    if "word_count" in qc:
-                        st.caption(f"📝 Kelime sayısı: {qc['word_count']}")
+                # Panel text was built with the answer (stored in query_results)
+                panels = st.session_state.query_results['panels']
 
-            # Citations (if enabled and exist)
-            if show_citations and result.get("citations"):
-                st.markdown("---")
-                st.subheader("📚 Kaynaklar")
-
-                for i, citation in enumerate(result["citations"], 1):
-                    # Use reference if available, otherwise use filename
-                    ref_text = citation.get('reference', citation.get('filename', f'Kaynak {i}'))
-                    with st.expander(f"[{i}] {ref_text}", expanded=False):
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.caption(f"📄 **{citation['filename']}**")
-                        with col2:
-                            st.caption(f"📖 Sayfa {citation['page']}")
-                        with col3:
-                            st.caption(f"⭐ Benzerlik: {citation['similarity']:.3f}")
-
-                        st.caption(f"🗂️ Bölüm: {citation['section']}")
-                        if citation.get('has_table'):
-                            st.caption("📊 Bu bölüm tablo içeriyor")
-
-            # Reasoning (if enabled)
-            if show_reasoning and result.get("reasoning"):
+                # Quality check (if enabled)
+                if show_quality_check and "quality_check" in result:
+                    qc = result["quality_check"]
+                    with st.expander("✅ Kalite Kontrolü", expanded=False):
+                        if panels["quality"]:
+                            st.markdown(panels["quality"])
+                    
+                        if "word_count" in qc:
+                            st.caption(f"📝 Kelime sayısı: {qc['word_count']}")
+
+                # Citations (if enabled and exist)
+                if show_citations and result.get("citations"):
+                    st.markdown("---")
+                    st.subheader("📚 Kaynaklar")
+
+                    _, page_citations = paginate(panels["citations"], key="citation_page")
+                    for label, details in page_citations:
+                        with st.expander(label, expanded=False):
+                            st.caption(details)
+
+                # Reasoning (if enabled)
+                if show_reasoning and result.get("reasoning"):
+                    st.markdown("---")
+                    with st.expander("🧠 Reasoning (DeepSeek R1)", expanded=False):
+                        st.markdown(result["reasoning"])
+
+                # Save to database and Export
                 st.markdown("---")
-                with st.expander("🧠 Reasoning (DeepSeek R1)", expanded=False):
-                    st.markdown(result["reasoning"])
-
-            # Save to database and Export
-            st.markdown("---")
-            st.subheader("💾 Kaydetme ve Export")
+                st.subheader("💾 Kaydetme ve Export")
 
-            # First row: Save to database
-            col_db1, col_db2 = st.columns([2, 1])
+                # First row: Save to database
+                col_db1, col_db2 = st.columns([2, 1])
             
-            with col_db1:
-                st.markdown("**📊 Database'e Kaydet**")
-                st.caption("Bu soruyu ve cevabını database'e kaydedin. Daha sonra 'Toplu Soru-Cevap > Kayıtlar' sekmesinden görebilirsiniz.")
+                with col_db1:
+                    st.markdown("**📊 Database'e Kaydet**")
+                    st.caption("Bu soruyu ve cevabını database'e kaydedin. Daha sonra 'Toplu Soru-Cevap > Kayıtlar' sekmesinden görebilirsiniz.")
             
-            with col_db2:
-                if st.button("💾 Database'e Kaydet", type="primary", use_container_width=True, key="save_to_db_btn"):
-                    try:
-                        # BatchQueryDB'yi initialize et
-                        if 'single_query_db' not in st.session_state:
-                            st.session_state.single_query_db = BatchQueryDB()
-                        
-                        # Database'e kaydet
-                        db = st.session_state.single_query_db
+                with col_db2:
+                    if st.button("💾 Database'e Kaydet", type="primary", use_container_width=True, key="save_to_db_btn"):
+                        try:
+                            # Database'e kaydet
+                            db = get_batch_db()
                         
-                        # Prepare data for database
-                        db_data = {
-                            'question': question,
-                            'answer': result['answer'],
-                            'mode': display_mode,
-                            'threshold': threshold,
-                            'top_k': top_k,
-                            'patient_info': st.session_state.patient_info if display_mode == "patient_personalized" else "",
-                            'citations': result.get('citations', []),
-                            'retrieval_results': results,
-                            'reasoning': result.get('reasoning', ''),
-                            'prompt_tokens': result.get('prompt_tokens', 0),
-                            'completion_tokens': result.get('completion_tokens', 0),
-                            'total_tokens': result.get('total_tokens', 0),
-                            'query_time': 0.0
-                        }
+                            # Prepare data for database
+                            db_data = {
+                                'question': question,
+                                'answer': result['answer'],
+                                'mode': display_mode,
+                                'threshold': threshold,
+                                'top_k': top_k,
+                                'patient_info': st.session_state.patient_info if display_mode == "patient_personalized" else "",
+                                # Only the DB's context slots (text is stored zstd-compressed)
+                                'citations': result.get('citations', [])[:MAX_CONTEXTS],
+                                'retrieval_results': [(row, row['score']) for row in results_flat[:MAX_CONTEXTS]],
+                                'reasoning': result.get('reasoning', ''),
+                                'prompt_tokens': result.get('prompt_tokens', 0),
+                                'completion_tokens': result.get('completion_tokens', 0),
+                                'total_tokens': result.get('total_tokens', 0),
+                                'query_time': 0.0
+                            }
                         
-                        row_id = db.insert_query(db_data)
-                        st.success(f"✅ Database'e kaydedildi! (ID: {row_id})")
-                        st.info("💡 'Toplu Soru-Cevap > Kayıtlar' sekmesinden tüm kayıtları görebilirsiniz.")
+                            row_id = db.insert_query(db_data)
+                            st.success(f"✅ Database'e kaydedildi! (ID: {row_id})")
+                            st.info("💡 'Toplu Soru-Cevap > Kayıtlar' sekmesinden tüm kayıtları görebilirsiniz.")
                     
-                    except Exception as e:
-                        st.error(f"❌ Kaydetme hatası: {e}")
+                        except Exception as e:
+                            st.error(f"❌ Kaydetme hatası: {e}")
 
-            st.markdown("---")
+                st.markdown("---")
 
-            # Second row: Export options
-            st.markdown("**📥 Dosya Olarak İndir**")
+                # Second row: Export options
+                st.markdown("**📥 Dosya Olarak İndir**")
             
-            c1, c2, c3 = st.columns(3)
-
-            with c1:
-                # JSON export
-                export_data = {
-                    "question": question,
-                    "answer": result["answer"],
-                    "mode": display_mode,
-                    "citations": result.get("citations", []),
-                    "reasoning": result.get("reasoning", ""),
-                    "metadata": {
-                        "prompt_tokens": result["prompt_tokens"],
-                        "completion_tokens": result["completion_tokens"],
-                        "total_tokens": result["total_tokens"],
-                        "temperature": result.get("temperature", 0.1)
-                    }
-                }
-
-                st.download_button(
-                    label="📄 JSON İndir",
-                    data=json.dumps(export_data, ensure_ascii=False, indent=2),
-                    file_name=f"answer_{question[:20]}.json",
-                    mime="application/json",
-                    key="export_json_download_btn"
-                )
+                # Serialized once, when the answer was stored
+                export_json_bytes, export_md_bytes = st.session_state.query_results['exports']
+
+                c1, c2, c3 = st.columns(3)
+
+                with c1:
+                    # JSON export
+                    st.download_button(
+                        label="📄 JSON İndir",
+                        data=export_json_bytes,
+                        file_name=f"answer_{st.session_state.query_results['slug']}.json",
+                        mime="application/json",
+                        key="export_json_download_btn"
+                    )
 
-            with c2:
-                # Markdown export
-                md_content = f"# {question}\n\n"
-                md_content += f"**Mod:** {mode_names[display_mode]}\n\n"
-                md_content += f"## Cevap\n\n{result['answer']}\n\n"
-
-                if result.get("citations"):
-                    md_content += "## Kaynaklar\n\n"
-                    for i, cit in enumerate(result["citations"], 1):
-                        ref_text = cit.get('reference', cit.get('filename', f'Kaynak {i}'))
-                        md_content += f"{i}. {ref_text} (Sayfa {cit['page']})\n"
-
-                st.download_button(
-                    label="📝 Markdown İndir",
-                    data=md_content,
-                    file_name=f"answer_{question[:20]}.md",
-                    mime="text/markdown",
-                    key="export_md_download_btn"
+                with c2:
+                    # Markdown export
+                    st.download_button(
+                        label="📝 Markdown İndir",
+                        data=export_md_bytes,
+                        file_name=f"answer_{st.session_state.query_results['slug']}.md",
+                        mime="text/markdown",
+                        key="export_md_download_btn"
+                    )
+
+                with c3:
+                    # Copy to clipboard: sticky across reruns, st.code has a copy button
+                    if st.toggle("📋 Metni Kopyala", value=False, key="show_copy"):
+                        st.code(result["answer"], language=None, wrap_lines=True)
+
+                # Token usage
+                st.caption(
+                    f"🪙 Token kullanımı: {result['total_tokens']} total "
+                    f"({result['prompt_tokens']} prompt + {result['completion_tokens']} completion) | "
+                    f"Temperature: {result.get('temperature', 0.1)}"
                 )
 
-            with c3:
-                # Copy to clipboard
-                if st.button("📋 Metni Kopyala", key="copy_answer_btn"):
-                    st.text_area(
-                        "Kopyalanacak Metin",
-                        result["answer"],
-                        height=200,
-                        key="copy_text_area"
-                    )
+            render_results()
 
-            # Token usage
-            st.caption(
-                f"🪙 Token kullanımı: {result['total_tokens']} total "
-                f"({result['prompt_tokens']} prompt + {result['completion_tokens']} completion) | "
-                f"Temperature: {result.get('temperature', 0.1)}"
-            )
+        render_query_panel()
 
     # Footer
     st.markdown("---")